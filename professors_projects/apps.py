@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ProfessorsProjectsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "professors_projects"
+
+    def ready(self):
+        from . import instrumentation, signals  # noqa: F401
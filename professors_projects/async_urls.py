@@ -0,0 +1,14 @@
+from django.urls import path
+from . import async_views, views
+
+# Served ahead of professors_projects.urls under ASGI; see project_claiming_website.asgi_urls.
+urlpatterns = [
+    path('api/projects/', async_views.project_list),
+    path('api/available-projects/', async_views.available_projects),
+    path('api/completed-projects/', async_views.completed_projects),
+    path('api/project-search/', async_views.project_search),
+    path('api/professor-dashboard/', async_views.professor_dashboard),
+    path('api/student-dashboard/', async_views.student_dashboard),
+    path('api/exports/claims.<str:export_format>', async_views.claim_export),
+    path('api/project-events/', views.project_event_stream, name='api-project-events'),
+]
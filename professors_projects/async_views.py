@@ -0,0 +1,184 @@
+from collections import defaultdict
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework_simplejwt.settings import api_settings
+from .authentication import ClaimsJWTAuthentication
+from .cache import catalog_cache, arequest_catalog_version
+from .models import Professor, Project, Student, ProjectClaim, adashboard_marker
+from .serializers import ProjectSerializer, ProjectClaimSerializer, ProjectClaimSummarySerializer, parse_fieldset
+from .fast_serializers import claim_values, group_students, serialize_claims, student_rows
+from . import exports
+from .views import filter_project_search, paginate_projects
+
+# ASGI-native twins of the read-only API views, routed by project_claiming_website.asgi_urls.
+# They answer 304s, cache hits and dashboards on the event loop with the async ORM; DRF's cursor
+# pagination is synchronous, so a listing cache miss makes a single hop to the sync thread.
+
+
+def render(data, status=200):
+    # Rendered with DRF's JSON renderer so the bytes match the synchronous views.
+    return HttpResponse(JSONRenderer().render(data), content_type='application/json', status=status)
+
+
+def paginate(request, queryset, ordering=None, absolute_urls=False):
+    return paginate_projects(Request(request), queryset, ordering, absolute_urls)
+
+
+async def students_map(key, ids):
+    return group_students([row async for row in student_rows(key, ids)])
+
+
+async def authenticate(request):
+    # None without credentials; a bad token raises AuthenticationFailed, as it does in DRF.
+    if not request.META.get(api_settings.AUTH_HEADER_NAME):
+        return None
+    result = await sync_to_async(ClaimsJWTAuthentication().authenticate)(request)
+    return result[0] if result else None
+
+
+def authenticated(view):
+    # The catalog is public, but a request carrying a bad token gets the same 401 as the sync views.
+    async def wrapper(request, *args, **kwargs):
+        try:
+            await authenticate(request)
+        except AuthenticationFailed as error:
+            return unauthenticated(error)
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+async def conditional(request, etag, build):
+    etag = quote_etag(etag)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        try:
+            response = render(await build())
+        except ValidationError as error:
+            return render(error.detail, status=400)
+    response['ETag'] = etag
+    return response
+
+
+def catalog_listing(name, queryset, absolute_urls=False):
+    @authenticated
+    async def view(request):
+        async def build():
+            return await catalog_cache.aget_or_build(
+                name, request, lambda: paginate(request, queryset, absolute_urls=absolute_urls)
+            )
+        return await conditional(request, f'catalog-{await arequest_catalog_version(request)}', build)
+    return view
+
+
+project_list = catalog_listing('projects', Project.objects.all())
+
+available_projects = catalog_listing('available-projects', Project.objects.filter(is_available=True), absolute_urls=True)
+
+completed_projects = catalog_listing(
+    'completed-projects', Project.objects.filter(is_available=False).exclude(project_file='')
+)
+
+
+@authenticated
+async def project_search(request):
+    queryset, ordering = filter_project_search(Project.objects.all(), request.GET)
+    try:
+        return render(await sync_to_async(paginate)(request, queryset, ordering, absolute_urls=True))
+    except ValidationError as error:
+        return render(error.detail, status=400)
+
+
+async def get_profile(user, role_model):
+    # ClaimsJWTAuthentication has usually settled the role from the token already.
+    field = type(user)._meta.get_field(role_model._meta.model_name)
+    if field.is_cached(user):
+        return field.get_cached_value(user)
+    return await role_model.objects.filter(user=user).afirst()
+
+
+def unauthenticated(error=None):
+    # Mirrors DRF's exception handler: list and dict details are the body, anything else is wrapped.
+    detail = 'Authentication credentials were not provided.' if error is None else error.detail
+    response = render(detail if isinstance(detail, (list, dict)) else {'detail': detail}, status=401)
+    response['WWW-Authenticate'] = 'Bearer realm="api"'
+    return response
+
+
+def dashboard(role_model, message):
+    def decorator(build):
+        async def view(request):
+            try:
+                user = await authenticate(request)
+            except AuthenticationFailed as error:
+                return unauthenticated(error)
+            if user is None:
+                return unauthenticated()
+            profile = await get_profile(user, role_model)
+            if profile is None:
+                return render({'message': message}, status=403)
+
+            role = role_model._meta.model_name
+            etag = f'{role}-{user.pk}-{await adashboard_marker(role, profile)}'
+            response = await conditional(request, etag, lambda: build(request, profile))
+            patch_vary_headers(response, ['Authorization'])
+            return response
+        return view
+    return decorator
+
+
+@dashboard(Professor, 'Only professors can access this dashboard')
+async def professor_dashboard(request, professor):
+    projects = [
+        project async for project in ProjectSerializer.setup_eager_loading(Project.objects.filter(professor=professor))
+    ]
+    claims_by_project = defaultdict(list)
+    async for claim in ProjectClaimSummarySerializer.setup_eager_loading(
+        ProjectClaim.objects.filter(project__professor=professor)
+    ):
+        claims_by_project[claim.project_id].append(claim)
+
+    return [
+        {
+            'project': project_data,
+            'claims': ProjectClaimSummarySerializer(claims_by_project[project.id], many=True).data,
+        }
+        for project, project_data in zip(projects, ProjectSerializer(projects, many=True).data)
+    ]
+
+
+@dashboard(Student, 'Only students can access this dashboard')
+async def student_dashboard(request, student):
+    fieldset = parse_fieldset(request.GET)
+    queryset = ProjectClaim.objects.filter(students=student)
+    if not fieldset:
+        rows = [row async for row in claim_values(queryset)]
+        return serialize_claims(
+            rows,
+            students=await students_map('projectclaim', [row['id'] for row in rows]),
+            claimed_by=await students_map('projectclaimrelation__project', [row['project__id'] for row in rows]),
+        )
+    claims = [claim async for claim in ProjectClaimSerializer.setup_eager_loading(queryset, **fieldset)]
+    return ProjectClaimSerializer(claims, many=True, **fieldset).data
+
+
+async def claim_export(request, export_format):
+    try:
+        user = await authenticate(request)
+    except AuthenticationFailed as error:
+        return unauthenticated(error)
+    if user is None:
+        return unauthenticated()
+    if not user.is_staff:
+        return render({'detail': 'You do not have permission to perform this action.'}, status=403)
+    if export_format not in exports.EXPORT_FORMATS:
+        return render({'message': f"Exports are available as {', '.join(exports.EXPORT_FORMATS)}"}, status=404)
+    try:
+        rows = exports.claim_rows(request.GET.get('status') or 'approved', request.GET.get('since'), request.GET.get('until'))
+    except ValueError as error:
+        return render({'message': str(error)}, status=400)
+    return exports.export_response(exports.aexport_lines(rows, export_format), export_format)
@@ -0,0 +1,132 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+ROLES = ('student', 'professor')
+ROLE_CLAIM = 'role'
+PROFILE_CLAIM = 'profile_id'
+
+
+def user_role(user):
+    """Return (role, profile) for a user, or (None, None) for accounts that are neither."""
+    for role in ROLES:
+        profile = getattr(user, role, None)
+        if profile is not None:
+            return role, profile
+    return None, None
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """A refresh token, and through access_token its access token, that carries the user's role and profile pk."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        role, profile = user_role(user)
+        if role:
+            token[ROLE_CLAIM] = role
+            token[PROFILE_CLAIM] = profile.pk
+        return token
+
+
+class UserCache:
+    """
+    Authenticated users, with their profile attached, kept in-process for AUTH_USER_CACHE_TTL seconds.
+    Saves and deletes in this process invalidate an entry at once (see signals.py); other worker
+    processes notice within the TTL.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, role):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires, cached_role, user = entry
+            if expires < time.monotonic() or cached_role != role:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+        # Each request gets its own copy, so nothing it caches on the user leaks into the next one.
+        return copy.copy(user)
+
+    def set(self, user_id, role, user):
+        ttl = getattr(settings, 'AUTH_USER_CACHE_TTL', 60)
+        if not ttl:
+            return
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + ttl, role, copy.copy(user))
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that trusts the role and profile_id claims added at login. The user and the
+    profile named by the token come back from one joined query, the other role is marked absent so
+    hasattr(request.user, 'professor') never queries, and the result is served from user_cache
+    afterwards. Tokens without the claims still work; their profiles load on first access as before.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        role = validated_token.get(ROLE_CLAIM)
+        if role not in ROLES:
+            role = None
+        user = user_cache.get(user_id, role)
+        if user is None:
+            user = self.load_user(user_id, role, validated_token.get(PROFILE_CLAIM))
+            user_cache.set(user_id, role, user)
+
+        if not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return user
+
+    def load_user(self, user_id, role, profile_id):
+        users = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+        if role:
+            users = users.select_related(role)
+        user = users.first()
+        if user is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+
+        if role:
+            profile = getattr(user, role, None)
+            if profile is None or profile.pk != profile_id:
+                raise AuthenticationFailed(_('The user no longer has the role this token was issued for'), code='role_changed')
+            for other in ROLES:
+                if other != role:
+                    User._meta.get_field(other).set_cached_value(user, None)
+        return user
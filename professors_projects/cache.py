@@ -0,0 +1,161 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from asgiref.sync import sync_to_async
+from .models import get_catalog_version, aget_catalog_version
+
+
+def detach(data):
+    # DRF's ReturnList/ReturnDict hold a reference to their serializer, and through it to every
+    # model instance; cache plain copies so entries do not keep querysets alive.
+    if isinstance(data, dict):
+        return {key: detach(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [detach(item) for item in data]
+    return data
+
+
+def request_catalog_version(request):
+    # Read the version once per request; the ETag check and the cache lookup share it.
+    if not hasattr(request, 'catalog_version'):
+        request.catalog_version = get_catalog_version()
+    return request.catalog_version
+
+
+async def arequest_catalog_version(request):
+    if not hasattr(request, 'catalog_version'):
+        request.catalog_version = await aget_catalog_version()
+    return request.catalog_version
+
+
+# Backends provide get/set for the sync views and aget/aset for the async ones.
+
+class LRUBackend:
+    """In-process least-recently-used cache; fastest, but each worker process keeps its own copy."""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # The lock is only held for a dict operation, so taking it on the event loop is fine.
+    async def aget(self, key):
+        return self.get(key)
+
+    async def aset(self, key, value):
+        self.set(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DjangoCacheBackend:
+    """Stores responses in one of the configured Django caches, shared between processes."""
+
+    def __init__(self, alias='default', timeout=300):
+        self.cache = caches[alias]
+        self.timeout = timeout
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value):
+        self.cache.set(key, value, self.timeout)
+
+    # Django's async cache methods run blocking backends (database, file) in a worker thread.
+    async def aget(self, key):
+        return await self.cache.aget(key)
+
+    async def aset(self, key, value):
+        await self.cache.aset(key, value, self.timeout)
+
+    def clear(self):
+        self.cache.clear()
+
+
+class ResponseCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        # Requests in worker threads count lookups at the same time; += is not atomic.
+        self._stats_lock = threading.Lock()
+
+    def make_key(self, name, version, request):
+        # The absolute URI covers the query string and the host used in pagination links.
+        uri = hashlib.sha1(request.build_absolute_uri().encode()).hexdigest()
+        return f'catalog:{version}:{name}:{uri}'
+
+    def get_or_build(self, name, request, build):
+        key = self.make_key(name, request_catalog_version(request), request)
+        data = self.backend.get(key)
+        self.count(data is not None)
+        if data is not None:
+            return data
+        data = detach(build())
+        self.backend.set(key, data)
+        return data
+
+    async def aget_or_build(self, name, request, build):
+        key = self.make_key(name, await arequest_catalog_version(request), request)
+        data = await self.backend.aget(key)
+        self.count(data is not None)
+        if data is not None:
+            return data
+        data = detach(await sync_to_async(build)())
+        await self.backend.aset(key, data)
+        return data
+
+    def count(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        stats = {
+            'backend': type(self.backend).__name__,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+        }
+        if hasattr(self.backend, '__len__'):
+            stats['entries'] = len(self.backend)
+        return stats
+
+    def clear(self):
+        self.backend.clear()
+
+
+def build_catalog_cache():
+    config = getattr(settings, 'CATALOG_CACHE', {})
+    backend_class = import_string(config.get('BACKEND', 'professors_projects.cache.LRUBackend'))
+    return ResponseCache(backend_class(**config.get('OPTIONS', {})))
+
+
+catalog_cache = build_catalog_cache()
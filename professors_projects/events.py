@@ -0,0 +1,105 @@
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from django.apps import apps
+from django.db import transaction
+
+PROJECT_EVENT_FIELDS = ('project_id', 'is_available', 'claimed_count', 'pending_claims_count', 'file_upload_date')
+
+
+class Subscription:
+    def __init__(self, loop, max_queued):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_queued)
+        self.overflowed = False
+        self.start_id = None
+
+    def push(self, event):
+        # Runs on the subscriber's event loop. A client that cannot keep up is cut off and
+        # catches up from the ring buffer when it reconnects with its last event id.
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class EventBroker:
+    """
+    In-process publish/subscribe hub for server-sent events. Recent events are kept in a ring
+    buffer so reconnecting clients can resume from their last event id. Each worker process has
+    its own broker, so clients only see changes made through the process they are connected to.
+    """
+
+    def __init__(self, buffer_size=1000, max_queued=256):
+        self.max_queued = max_queued
+        self._events = deque(maxlen=buffer_size)
+        # Ids continue from the clock so ids handed out by a previous process never look current.
+        self._last_id = int(time.time() * 1000)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def publish(self, event_type, data):
+        with self._lock:
+            self._last_id += 1
+            event = (self._last_id, event_type, data)
+            self._events.append(event)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.push, event)
+            except RuntimeError:
+                # The subscriber's loop has closed under it.
+                self.unsubscribe(subscription)
+        return event
+
+    def events_after(self, last_id):
+        """Buffered events newer than last_id, or None if some of them are no longer buffered."""
+        with self._lock:
+            return self._events_after(last_id)
+
+    def _events_after(self, last_id):
+        if not self._last_id - len(self._events) <= last_id <= self._last_id:
+            return None
+        return [event for event in self._events if event[0] > last_id]
+
+    def subscribe(self, last_id=None):
+        """
+        Register a subscriber on the running event loop. Returns the subscription and the events
+        to replay first; the replay is None if the client missed events that have been dropped.
+        """
+        subscription = Subscription(asyncio.get_running_loop(), self.max_queued)
+        with self._lock:
+            backlog = [] if last_id is None else self._events_after(last_id)
+            subscription.start_id = self._last_id
+            self._subscribers.add(subscription)
+        return subscription, backlog
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def __len__(self):
+        return len(self._subscribers)
+
+
+def format_event(event):
+    event_id, event_type, data = event
+    return f'id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+
+def publish_projects(pks):
+    Project = apps.get_model('professors_projects', 'Project')
+    for row in Project.objects.filter(pk__in=pks).values('id', *PROJECT_EVENT_FIELDS):
+        if row['file_upload_date'] is not None:
+            row['file_upload_date'] = row['file_upload_date'].isoformat()
+        project_events.publish('project', row)
+
+
+def project_changed(*pks):
+    """Publish the current state of the given projects once the surrounding transaction commits."""
+    transaction.on_commit(lambda: publish_projects(pks))
+
+
+project_events = EventBroker()
@@ -0,0 +1,116 @@
+import csv
+import json
+from datetime import datetime, time, timedelta
+from itertools import islice
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+from django.utils.dateparse import parse_date
+from .models import ProjectClaim
+
+# One row per student on a claim. Rows are read straight from the claim/student join table with
+# values_list() and iterator(chunk_size=...), so an export holds one chunk in memory at a time.
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+EXPORT_COLUMNS = (
+    'claim_id', 'status', 'created_at', 'approved_at', 'project_id', 'project_title',
+    'professor_suid', 'professor_name', 'student_suid', 'student_name',
+)
+CLAIM_STATUSES = ('approved', 'pending', 'all')
+CHUNK_SIZE = 2000
+
+
+def parse_day(value, name):
+    day = parse_date(value or '')
+    if day is None:
+        raise ValueError(f'{name} must be a date like 2024-01-31')
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def claim_rows(status='approved', since=None, until=None):
+    """
+    The export rows for claims in the given state whose created_at falls between since and until,
+    both inclusive YYYY-MM-DD dates. Raises ValueError for an unknown status or a malformed date.
+    """
+    rows = ProjectClaim.students.through.objects.all()
+    if status not in CLAIM_STATUSES:
+        raise ValueError(f"status must be one of {', '.join(CLAIM_STATUSES)}")
+    if status != 'all':
+        rows = rows.filter(projectclaim__is_approved=status == 'approved')
+    if since:
+        rows = rows.filter(projectclaim__created_at__gte=parse_day(since, 'since'))
+    if until:
+        rows = rows.filter(projectclaim__created_at__lt=parse_day(until, 'until') + timedelta(days=1))
+    return rows.order_by('projectclaim_id', 'student_id').values_list(
+        'projectclaim_id', 'projectclaim__is_approved', 'projectclaim__created_at', 'projectclaim__approved_at',
+        'projectclaim__project__project_id', 'projectclaim__project__title',
+        'projectclaim__project__professor__suid', 'projectclaim__project__professor__first_name',
+        'projectclaim__project__professor__last_name',
+        'student__suid', 'student__first_name', 'student__last_name',
+    )
+
+
+def export_record(row):
+    (claim_id, is_approved, created_at, approved_at, project_id, title,
+     professor_suid, professor_first, professor_last, student_suid, student_first, student_last) = row
+    return (
+        claim_id,
+        'approved' if is_approved else 'pending',
+        timezone.localtime(created_at).isoformat(),
+        timezone.localtime(approved_at).isoformat() if approved_at else None,
+        project_id,
+        title,
+        professor_suid,
+        f'{professor_first} {professor_last}',
+        student_suid,
+        f'{student_first} {student_last}',
+    )
+
+
+class Echo:
+    # csv.writer writes each row to this and hands back the formatted line.
+    def write(self, value):
+        return value
+
+
+class LineEncoder:
+    """Turns export records into the lines of a CSV (with a header) or NDJSON file."""
+
+    def __init__(self, export_format):
+        self.export_format = export_format
+        self.writer = csv.writer(Echo())
+
+    def header(self):
+        return [self.writer.writerow(EXPORT_COLUMNS)] if self.export_format == 'csv' else []
+
+    def encode(self, row):
+        record = export_record(row)
+        if self.export_format == 'csv':
+            return self.writer.writerow(['' if value is None else value for value in record])
+        return json.dumps(dict(zip(EXPORT_COLUMNS, record))) + '\n'
+
+
+def export_lines(rows, export_format, chunk_size=CHUNK_SIZE):
+    encoder = LineEncoder(export_format)
+    yield from encoder.header()
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield encoder.encode(row)
+
+
+async def aexport_lines(rows, export_format, chunk_size=CHUNK_SIZE):
+    # The ASGI twin: StreamingHttpResponse reads a sync iterator to the end before sending anything.
+    # aiterator() cannot stream values_list() rows in Django 5.0, so the sync generator is advanced
+    # one chunk at a time on the sync thread instead, keeping its cursor on that thread.
+    lines = export_lines(rows, export_format, chunk_size)
+    next_chunk = sync_to_async(lambda: ''.join(islice(lines, chunk_size)))
+    while chunk := await next_chunk():
+        yield chunk
+
+
+def export_response(lines, export_format):
+    response = StreamingHttpResponse(lines, content_type=EXPORT_FORMATS[export_format])
+    response['Content-Disposition'] = content_disposition_header(True, f'claims.{export_format}')
+    return response
@@ -0,0 +1,124 @@
+from collections import defaultdict
+from rest_framework import serializers
+from .instrumentation import timed
+from .models import Student
+from .serializers import ProjectSerializer
+from .storage import project_file_storage
+
+# Row-based twins of ProjectSerializer and ProjectClaimSerializer for the hot list endpoints. They
+# render values() rows with plain functions and produce exactly the same JSON; the equivalence
+# tests in tests.py keep them in step with the serializers whenever a field changes there.
+
+PROJECT_FIELDS = tuple(ProjectSerializer.Meta.fields)
+
+# The same field instances the serializers use, so timezone handling and formats cannot drift.
+render_datetime = serializers.DateTimeField().to_representation
+render_upload_date = ProjectSerializer._declared_fields['file_upload_date'].to_representation
+
+# values() columns each project field reads.
+PROJECT_COLUMNS = {
+    'id': ('id',),
+    'professor_name': ('professor__first_name', 'professor__last_name'),
+    'claimed_by': (),
+    'title': ('title',),
+    'description': ('description',),
+    'project_id': ('project_id',),
+    'is_available': ('is_available',),
+    'claimed_at': ('claimed_at',),
+    'project_file': ('project_file',),
+    'file_upload_date': ('file_upload_date',),
+    'max_students': ('max_students',),
+}
+
+
+def student_rows(key, ids):
+    # Same shape as the claimed_by/students prefetches, so students come back in the same order.
+    return Student.objects.filter(**{f'{key}__in': ids}).values_list(key, 'suid', 'first_name', 'last_name')
+
+
+def group_students(rows):
+    """Map each project or claim id to its students' {'id', 'name'} entries."""
+    grouped = defaultdict(list)
+    for owner_id, suid, first_name, last_name in rows:
+        grouped[owner_id].append({'id': suid, 'name': f"{first_name} {last_name}"})
+    return grouped
+
+
+def claimed_by_map(project_ids):
+    return group_students(student_rows('projectclaimrelation__project', project_ids))
+
+
+def claim_students_map(claim_ids):
+    return group_students(student_rows('projectclaim', claim_ids))
+
+
+def file_url(name, request):
+    if not name:
+        return None
+    url = project_file_storage().url(name)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def project_columns(fields=None, prefix=''):
+    columns = {prefix + 'id'}
+    for name in fields or PROJECT_FIELDS:
+        columns.update(prefix + column for column in PROJECT_COLUMNS[name])
+    return columns
+
+
+def project_values(queryset, fields=None, *extra):
+    """The values() queryset that serialize_projects needs for the given fields, plus any extra columns."""
+    return queryset.values(*project_columns(fields), *extra)
+
+
+@timed('serialize')
+def serialize_projects(rows, fields=None, request=None, prefix='', claimed_by=None):
+    """
+    Render project_values() rows as ProjectSerializer would, optionally limited to fields.
+    request makes file URLs absolute, as the serializer context does on the generic views.
+    claimed_by is looked up with one query unless the caller already has it (see claimed_by_map).
+    """
+    fields = [name for name in PROJECT_FIELDS if fields is None or name in fields]
+    rows = list(rows)
+    if claimed_by is None and 'claimed_by' in fields:
+        claimed_by = claimed_by_map([row[prefix + 'id'] for row in rows])
+
+    renderers = {
+        'id': lambda row: row[prefix + 'id'],
+        'professor_name': lambda row: f"{row[prefix + 'professor__first_name']} {row[prefix + 'professor__last_name']}",
+        'claimed_by': lambda row: claimed_by.get(row[prefix + 'id'], []),
+        'title': lambda row: row[prefix + 'title'],
+        'description': lambda row: row[prefix + 'description'],
+        'project_id': lambda row: row[prefix + 'project_id'],
+        'is_available': lambda row: row[prefix + 'is_available'],
+        'claimed_at': lambda row: render_datetime(row[prefix + 'claimed_at']),
+        'project_file': lambda row: file_url(row[prefix + 'project_file'], request),
+        'file_upload_date': lambda row: render_upload_date(row[prefix + 'file_upload_date']),
+        'max_students': lambda row: row[prefix + 'max_students'],
+    }
+    columns = [(name, renderers[name]) for name in fields]
+    return [{name: render(row) for name, render in columns} for row in rows]
+
+
+def claim_values(queryset):
+    return queryset.values('id', 'is_approved', 'created_at', 'approved_at', *project_columns(prefix='project__'))
+
+
+@timed('serialize')
+def serialize_claims(rows, request=None, students=None, claimed_by=None):
+    """Render claim_values() rows as ProjectClaimSerializer would."""
+    rows = list(rows)
+    if students is None:
+        students = claim_students_map([row['id'] for row in rows])
+    projects = serialize_projects(rows, request=request, prefix='project__', claimed_by=claimed_by)
+    return [
+        {
+            'id': row['id'],
+            'students': students.get(row['id'], []),
+            'project': project,
+            'is_approved': row['is_approved'],
+            'created_at': render_datetime(row['created_at']),
+            'approved_at': render_datetime(row['approved_at']),
+        }
+        for row, project in zip(rows, projects)
+    ]
@@ -0,0 +1,123 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe, quote_etag
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+# Same mapping FileResponse uses, so compressed archives are not labelled as their inner format.
+ENCODING_TYPES = {
+    'bzip2': 'application/x-bzip',
+    'gzip': 'application/gzip',
+    'xz': 'application/x-xz',
+}
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def content_type_for(name):
+    content_type, encoding = mimetypes.guess_type(name)
+    return ENCODING_TYPES.get(encoding, content_type) or 'application/octet-stream'
+
+
+def parse_range(header, size):
+    """
+    Parse a Range header into an inclusive (start, end) byte range. Returns None when the whole
+    file should be sent instead, which is how malformed and multi-range requests are answered.
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if not start:
+        suffix = int(end)
+        if not suffix or not size:
+            raise RangeNotSatisfiable
+        return max(size - suffix, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size:
+        raise RangeNotSatisfiable
+    if end < start:
+        return None
+    return start, end
+
+
+def read_range(file, start, length):
+    with file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def serve_project_file(request, project):
+    """
+    Send project.project_file with validators, conditional GET and single byte-range support.
+    With settings.PROJECT_FILE_SENDFILE set, only headers are sent and the front proxy serves the bytes.
+    Raises FileNotFoundError if the file is missing from storage.
+    """
+    project_file = project.project_file
+    storage = project_file.storage
+    size = project_file.size
+    if project.file_upload_date:
+        last_modified = int(project.file_upload_date.timestamp())
+    else:
+        last_modified = int(storage.get_modified_time(project_file.name).timestamp())
+    etag = quote_etag(f'{project.project_id}-{size}-{last_modified}')
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = file_response(request, project_file, size, etag, last_modified)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    if response.status_code in (200, 206):
+        filename = project.project_file_name or os.path.basename(project_file.name)
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
+
+
+def file_response(request, project_file, size, etag, last_modified):
+    content_type = content_type_for(project_file.name)
+    sendfile = getattr(settings, 'PROJECT_FILE_SENDFILE', None)
+    if sendfile:
+        response = HttpResponse(content_type=content_type)
+        if sendfile == 'x-accel-redirect':
+            prefix = getattr(settings, 'PROJECT_FILE_ACCEL_PREFIX', '/protected/')
+            response['X-Accel-Redirect'] = prefix.rstrip('/') + '/' + quote(project_file.name)
+        else:
+            response['X-Sendfile'] = project_file.storage.path(project_file.name)
+        return response
+
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    # A stale If-Range means the client's partial copy is of an older file: send it all again.
+    if 'Range' in request.headers and (if_range is None or if_range == etag or parse_http_date_safe(if_range) == last_modified):
+        try:
+            byte_range = parse_range(request.headers['Range'], size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if byte_range is None:
+        response = FileResponse(project_file.open('rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            read_range(project_file.open('rb'), start, end - start + 1), status=206, content_type=content_type
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    response['Accept-Ranges'] = 'bytes'
+    return response
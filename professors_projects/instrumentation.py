@@ -0,0 +1,257 @@
+import functools
+import json
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils import timezone
+
+logger = logging.getLogger('professors_projects.timing')
+
+DEFAULTS = {
+    'SAMPLE_RATE': 0.1,
+    'SLOW_REQUEST_MS': 500,
+    'SLOW_REQUESTS_KEPT': 50,
+    'N_PLUS_ONE_THRESHOLD': 10,
+}
+# Statements kept per request for the slow-request log; the counts always cover every query.
+MAX_SQL_KEPT = 200
+
+# The measurements of the request being handled, or None when it was not sampled. Context
+# variables follow sync_to_async into worker threads, so async views are measured too.
+current_metrics = ContextVar('request_metrics', default=None)
+
+QUOTED_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+IN_LIST_RE = re.compile(r'\(\?(?:, \?)*\)')
+
+
+def timing_config():
+    return {**DEFAULTS, **getattr(settings, 'REQUEST_TIMING', {})}
+
+
+def query_template(sql):
+    """The shape of a statement: literals and placeholders become ?, and IN lists of any length match."""
+    sql = QUOTED_RE.sub('?', sql.replace('%s', '?'))
+    return IN_LIST_RE.sub('(...)', NUMBER_RE.sub('?', sql))
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.templates = Counter()
+        self.statements = []
+        self.spans = Counter()
+        self.view_started = None
+        self.view_finished = None
+        self.render_started = None
+
+    def add_query(self, sql, seconds):
+        self.queries += 1
+        self.db_time += seconds
+        self.templates[query_template(sql)] += 1
+        if len(self.statements) < MAX_SQL_KEPT:
+            self.statements.append({'sql': sql, 'ms': round(seconds * 1000, 3)})
+
+    def add_span(self, name, seconds):
+        self.spans[name] += seconds
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.add_query(sql, time.perf_counter() - started)
+
+
+def install_query_recorder(sender=None, connection=None, **kwargs):
+    # Installed once per connection and left in place; unsampled requests pay one ContextVar lookup per query.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_recorder)
+for open_connection in connections.all(initialized_only=True):
+    install_query_recorder(connection=open_connection)
+
+
+def timed(name):
+    """Add the decorated function's running time to the sampled request's `name` span."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            metrics = current_metrics.get()
+            if metrics is None:
+                return function(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                metrics.add_span(name, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+class SlowRequestLog:
+    """The most recent requests slower than SLOW_REQUEST_MS, with their SQL; the oldest fall out first."""
+
+    def __init__(self):
+        self._entries = deque()
+        self._lock = threading.Lock()
+
+    def add(self, record, size):
+        with self._lock:
+            self._entries.append(record)
+            while len(self._entries) > size:
+                self._entries.popleft()
+
+    def snapshot(self):
+        with self._lock:
+            entries = list(self._entries)
+        return sorted(entries, key=lambda record: record['total_ms'], reverse=True)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+slow_requests = SlowRequestLog()
+
+
+def milliseconds(seconds):
+    return round(seconds * 1000, 3)
+
+
+class RequestTimingMiddleware:
+    """
+    Measures a sample of requests: SQL query count and time, view time, serialization time
+    (fast-path serializers plus response rendering) and the total. Sampled responses carry them
+    in a Server-Timing header and are logged as one JSON line on professors_projects.timing;
+    query templates repeated more than N_PLUS_ONE_THRESHOLD times are flagged as likely N+1s.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # Keeps the hooks on the event loop instead of a thread hop for every request.
+            self.process_view = self.aprocess_view
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        config = timing_config()
+        if random.random() >= config['SAMPLE_RATE']:
+            return self.get_response(request)
+        metrics = RequestMetrics()
+        request.timing = metrics
+        token = current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics, config)
+
+    async def __acall__(self, request):
+        config = timing_config()
+        if random.random() >= config['SAMPLE_RATE']:
+            return await self.get_response(request)
+        metrics = RequestMetrics()
+        request.timing = metrics
+        token = current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.finish(request, response, metrics, config)
+
+    # In async mode the instance attributes shadow the sync hooks, so the async twins call the
+    # shared helpers below rather than self.process_view, which would be themselves.
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.start_view(request)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        self.start_view(request)
+
+    def process_template_response(self, request, response):
+        return self.start_render(request, response)
+
+    async def aprocess_template_response(self, request, response):
+        return self.start_render(request, response)
+
+    def start_view(self, request):
+        # The view span starts here, once the other middleware has processed the request.
+        metrics = getattr(request, 'timing', None)
+        if metrics is not None:
+            metrics.view_started = time.perf_counter()
+
+    def start_render(self, request, response):
+        # Called just before DRF renders the response; the render counts as serialization.
+        metrics = getattr(request, 'timing', None)
+        if metrics is not None:
+            metrics.view_finished = metrics.render_started = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: metrics.add_span('render', time.perf_counter() - metrics.render_started)
+            )
+        return response
+
+    def finish(self, request, response, metrics, config):
+        now = time.perf_counter()
+        total = now - metrics.started
+        serialize = metrics.spans['serialize'] + metrics.spans['render']
+        view = 0.0
+        if metrics.view_started is not None:
+            # Responses that are not rendered end the view span when they reach this middleware.
+            # Serializer time inside the view is reported under serialize only.
+            view = max(0.0, (metrics.view_finished or now) - metrics.view_started - metrics.spans['serialize'])
+        repeated = [
+            {'sql': template, 'count': count}
+            for template, count in metrics.templates.most_common()
+            if count > config['N_PLUS_ONE_THRESHOLD']
+        ]
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': milliseconds(total),
+            'view_ms': milliseconds(view),
+            'db_ms': milliseconds(metrics.db_time),
+            'serialize_ms': milliseconds(serialize),
+            'queries': metrics.queries,
+            'n_plus_one': repeated,
+        }
+
+        timings = [
+            f'db;dur={record["db_ms"]};desc="{metrics.queries} queries"',
+            f'view;dur={record["view_ms"]}',
+            f'serialize;dur={record["serialize_ms"]}',
+            f'total;dur={record["total_ms"]}',
+        ]
+        if response.has_header('Server-Timing'):
+            timings.insert(0, response['Server-Timing'])
+        response['Server-Timing'] = ', '.join(timings)
+
+        slow = record['total_ms'] >= config['SLOW_REQUEST_MS']
+        if slow:
+            slow_requests.add(
+                {**record, 'at': timezone.now().isoformat(), 'sql': metrics.statements}, config['SLOW_REQUESTS_KEPT']
+            )
+        logger.log(logging.WARNING if slow or repeated else logging.INFO, json.dumps(record), extra={'timing': record})
+        return response
@@ -0,0 +1,163 @@
+import asyncio
+import math
+import random
+import time
+from collections import defaultdict
+import httpx
+from django.db.models import Count, F, Q
+from django.urls import reverse
+from .models import Project, ProjectClaim
+
+# The steps of one student's session, in order, with the latency table's row names.
+ENDPOINTS = ('login', 'available', 'claim', 'dashboard')
+
+
+def percentile(ordered, pct):
+    """Nearest-rank percentile of an already sorted list; None when it is empty."""
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class LoadReport:
+    """Latency samples and outcomes for each endpoint of a claim rush."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.outcomes = defaultdict(lambda: defaultdict(int))
+        self.started = self.finished = None
+
+    def record(self, endpoint, outcome, seconds):
+        # outcome is the HTTP status, or the exception class name when no response arrived.
+        self.samples[endpoint].append(seconds)
+        self.outcomes[endpoint][outcome] += 1
+
+    @property
+    def duration(self):
+        return max((self.finished or time.perf_counter()) - self.started, 1e-6)
+
+    def rows(self):
+        """One dict per endpoint: counts, error rate, throughput and p50/p95/p99 in seconds."""
+        rows = []
+        for endpoint in ENDPOINTS:
+            latencies = sorted(self.samples[endpoint])
+            outcomes = self.outcomes[endpoint]
+            total = len(latencies)
+            ok = sum(count for outcome, count in outcomes.items() if isinstance(outcome, int) and outcome < 400)
+            # 4xx answers are the server refusing a claim on purpose; 5xx and dropped requests are errors.
+            rejected = sum(count for outcome, count in outcomes.items() if isinstance(outcome, int) and 400 <= outcome < 500)
+            errors = total - ok - rejected
+            rows.append({
+                'endpoint': endpoint,
+                'requests': total,
+                'ok': ok,
+                'rejected': rejected,
+                'errors': errors,
+                'error_rate': errors / total if total else 0.0,
+                'throughput': total / self.duration,
+                'p50': percentile(latencies, 50),
+                'p95': percentile(latencies, 95),
+                'p99': percentile(latencies, 99),
+                'outcomes': dict(outcomes),
+            })
+        return rows
+
+
+async def timed(report, endpoint, request):
+    started = time.perf_counter()
+    try:
+        response = await request
+    except httpx.HTTPError as error:
+        report.record(endpoint, type(error).__name__, time.perf_counter() - started)
+        return None
+    report.record(endpoint, response.status_code, time.perf_counter() - started)
+    return response
+
+
+async def student_session(base_url, report, account, password, rng, page_size, timeout):
+    """
+    One student on claim day: log in, read the first page of available projects, claim one of
+    them for themselves and open the dashboard. Popular projects near the top of the page are
+    picked more often, as they are in practice, so claims pile up on the same rows.
+    """
+    username, suid = account
+    # A client per student keeps cookies and connections apart, like separate browsers.
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout) as client:
+        response = await timed(report, 'login', client.post(
+            reverse('api-user-login'), json={'username': username, 'password': password},
+        ))
+        if response is None or response.status_code != 200:
+            return
+        headers = {'Authorization': f"Bearer {response.json()['token']}"}
+
+        response = await timed(report, 'available', client.get(
+            reverse('api-available-projects'), params={'page_size': page_size}, headers=headers,
+        ))
+        if response is None or response.status_code != 200:
+            return
+        projects = response.json()['results']
+        if projects:
+            weights = [1 / (rank + 1) for rank in range(len(projects))]
+            project = rng.choices(projects, weights=weights)[0]
+            await timed(report, 'claim', client.post(
+                reverse('api-claim-project', args=[project['project_id']]), json={'student_ids': [suid]}, headers=headers,
+            ))
+
+        await timed(report, 'dashboard', client.get(reverse('api-student-dashboard'), headers=headers))
+
+
+async def claim_rush(base_url, accounts, password, concurrency=100, ramp=60.0, seed=0, page_size=50, timeout=30.0):
+    """
+    Replay claim day against a running server: each account starts its session at a random
+    moment within the first ramp seconds, with at most concurrency sessions in flight.
+    """
+    rng = random.Random(seed)
+    report = LoadReport()
+    starts = sorted(rng.uniform(0, ramp) for _ in accounts)
+    limit = asyncio.Semaphore(concurrency)
+
+    async def run(account, start, session_rng):
+        await asyncio.sleep(max(0.0, report.started + start - time.perf_counter()))
+        async with limit:
+            await student_session(base_url, report, account, password, session_rng, page_size, timeout)
+
+    report.started = time.perf_counter()
+    await asyncio.gather(*(
+        run(account, start, random.Random(rng.random())) for account, start in zip(accounts, starts)
+    ))
+    report.finished = time.perf_counter()
+    return report
+
+
+def oversubscription_violations(since):
+    """
+    Claim-table states the claim and approve views are meant to rule out, each mapped to the
+    offending ids. Claim checks only look at claims created from since onwards.
+    """
+    projects = Project.objects.annotate_actual_counts()
+    claims = ProjectClaim.objects.filter(created_at__gte=since)
+    return {
+        'projects over max_students': list(
+            projects.filter(actual_claimed__gt=F('max_students')).values_list('project_id', flat=True)
+        ),
+        'projects with several approved claims': list(
+            Project.objects.annotate(approved=Count('projectclaim', filter=Q(projectclaim__is_approved=True)))
+            .filter(approved__gt=1).values_list('project_id', flat=True)
+        ),
+        'projects with drifted counters': list(
+            projects.filter(~Q(actual_claimed=F('claimed_count')) | ~Q(actual_pending=F('pending_claims_count')))
+            .values_list('project_id', flat=True)
+        ),
+        'claims larger than the project allows': list(
+            claims.annotate(size=Count('students')).filter(size__gt=F('project__max_students')).values_list('pk', flat=True)
+        ),
+        'claims accepted after the project closed': list(
+            claims.filter(is_approved=False, project__is_available=False, project__claimed_at__lt=F('created_at'))
+            .values_list('pk', flat=True)
+        ),
+        'students claiming a project twice': list(
+            ProjectClaim.students.through.objects.filter(projectclaim__created_at__gte=since)
+            .values('projectclaim__project', 'student').annotate(copies=Count('pk')).filter(copies__gt=1)
+            .values_list('student__suid', flat=True)
+        ),
+    }
@@ -0,0 +1,134 @@
+import asyncio
+import io
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+HOST = 'localhost'
+
+
+def wsgi_get(application, path, query, headers):
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': HOST,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': HOST,
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+    }
+    environ.update({f'HTTP_{name.upper().replace("-", "_")}': value for name, value in headers.items()})
+    statuses = []
+    result = application(environ, lambda status, response_headers, exc_info=None: statuses.append(int(status[:3])))
+    try:
+        for _ in result:
+            pass
+    finally:
+        result.close()
+    return statuses[0]
+
+
+async def asgi_get(application, path, query, headers):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'headers': [(b'host', HOST.encode())] + [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        'server': (HOST, 80),
+        'client': ('127.0.0.1', 0),
+    }
+    received = False
+    statuses = []
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # The client never disconnects; Django cancels this wait once the response is sent.
+        await asyncio.Future()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+
+    await application(scope, receive, send)
+    return statuses[0]
+
+
+class Command(BaseCommand):
+    help = 'Compare concurrent read throughput of the WSGI and ASGI applications against the current database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/api/projects/', help='Path (and query string) to request')
+        parser.add_argument('--requests', type=int, default=1000, help='Requests sent to each application')
+        parser.add_argument('--concurrency', type=int, default=50, help='Requests in flight at once')
+        parser.add_argument('--username', help='Send a bearer token for this user, e.g. for the dashboards')
+
+    def handle(self, *args, **kwargs):
+        from project_claiming_website.asgi import application as asgi_application
+        from project_claiming_website.wsgi import application as wsgi_application
+
+        url = urlsplit(kwargs['url'])
+        headers = {}
+        if kwargs['username']:
+            try:
+                user = User.objects.get(username=kwargs['username'])
+            except User.DoesNotExist:
+                raise CommandError(f"User {kwargs['username']} does not exist")
+            headers['Authorization'] = f'Bearer {RefreshToken.for_user(user).access_token}'
+
+        total, concurrency = kwargs['requests'], kwargs['concurrency']
+
+        def timed_wsgi(_):
+            started = time.perf_counter()
+            status = wsgi_get(wsgi_application, url.path, url.query, headers)
+            return status, time.perf_counter() - started
+
+        async def run_asgi():
+            limit = asyncio.Semaphore(concurrency)
+
+            async def timed_asgi():
+                async with limit:
+                    started = time.perf_counter()
+                    status = await asgi_get(asgi_application, url.path, url.query, headers)
+                    return status, time.perf_counter() - started
+
+            return await asyncio.gather(*(timed_asgi() for _ in range(total)))
+
+        # One warm-up request each fills the response cache and opens the database connections.
+        wsgi_get(wsgi_application, url.path, url.query, headers)
+        asyncio.run(asgi_get(asgi_application, url.path, url.query, headers))
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            wsgi_results = list(executor.map(timed_wsgi, range(total)))
+        self.report('WSGI', wsgi_results, time.perf_counter() - started)
+
+        started = time.perf_counter()
+        asgi_results = asyncio.run(run_asgi())
+        self.report('ASGI', asgi_results, time.perf_counter() - started)
+
+    def report(self, name, results, elapsed):
+        latencies = sorted(latency for _, latency in results)
+        failures = sum(1 for status, _ in results if status >= 400)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        self.stdout.write(
+            f'{name}: {len(results) / elapsed:.1f} req/s, p50 {statistics.median(latencies) * 1000:.1f} ms, '
+            f'p95 {p95 * 1000:.1f} ms'
+        )
+        if failures:
+            self.stdout.write(self.style.ERROR(f'{name}: {failures} of {len(results)} requests failed'))
@@ -0,0 +1,120 @@
+import statistics
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from professors_projects import fast_serializers
+from professors_projects.models import Professor, Project, Student, ProjectClaim, ProjectClaimRelation
+from professors_projects.serializers import ProjectSerializer, ProjectClaimSerializer
+
+DIGITS = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def benchmark_project_id(n):
+    # 'b' plus three base-36 digits: 46656 ids that can never collide with the numeric ones the allocator hands out.
+    return 'b' + DIGITS[n // 1296 % 36] + DIGITS[n // 36 % 36] + DIGITS[n % 36]
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Time ProjectSerializer and ProjectClaimSerializer against the fast path on generated rows, then roll them back'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10000, help='Projects (and claims) to generate')
+        parser.add_argument('--students', type=int, default=2, help='Students claiming each project')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs of each serializer')
+
+    def handle(self, *args, **kwargs):
+        if not 0 < kwargs['rows'] <= 36 ** 3:
+            raise CommandError(f'--rows must be between 1 and {36 ** 3}')
+        try:
+            with transaction.atomic():
+                self.seed(kwargs['rows'], kwargs['students'])
+                self.compare(kwargs['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, rows, students_per_project):
+        started = time.perf_counter()
+        now = timezone.now()
+        professors = []
+        for i in range(3):
+            user = User.objects.create(username=f'benchmark-prof-{i}')
+            professors.append(Professor.objects.create(user=user, first_name='Prof', last_name=f'Bench{i}', suid=f'bp{i:08d}'))
+
+        projects = Project.objects.bulk_create(
+            Project(
+                professor=professors[i % len(professors)],
+                project_id=benchmark_project_id(i),
+                title=f'Benchmark project {i}',
+                description=f'Generated description for benchmark project {i}',
+                is_available=i % 2 == 1,
+                claimed_at=now if i % 2 == 0 else None,
+                project_file=f'project_files/benchmark-{i}.zip' if i % 2 == 0 else None,
+                file_upload_date=now if i % 2 == 0 else None,
+            )
+            for i in range(rows)
+        )
+        users = User.objects.bulk_create(
+            User(username=f'benchmark-student-{i}-{j}') for i in range(rows) for j in range(students_per_project)
+        )
+        students = Student.objects.bulk_create(
+            Student(user=user, first_name='Student', last_name='{}-{}'.format(*divmod(n, students_per_project)), suid=f'bs{n:08d}')
+            for n, user in enumerate(users)
+        )
+        claims = ProjectClaim.objects.bulk_create(
+            ProjectClaim(project=project, is_approved=not project.is_available, approved_at=project.claimed_at)
+            for project in projects
+        )
+        members = []
+        for i, (project, claim) in enumerate(zip(projects, claims)):
+            for student in students[i * students_per_project:(i + 1) * students_per_project]:
+                members.append(ProjectClaim.students.through(projectclaim=claim, student=student))
+        ProjectClaim.students.through.objects.bulk_create(members)
+        ProjectClaimRelation.objects.bulk_create(
+            ProjectClaimRelation(project=project, student=student)
+            for i, project in enumerate(projects) if not project.is_available
+            for student in students[i * students_per_project:(i + 1) * students_per_project]
+        )
+        self.stdout.write(f'Generated {rows} projects and claims in {time.perf_counter() - started:.1f}s')
+
+    def compare(self, repeat):
+        projects = Project.objects.filter(project_id__startswith='b').order_by('id')
+        claims = ProjectClaim.objects.filter(project__project_id__startswith='b').order_by('id')
+        cases = [
+            (
+                'projects',
+                lambda: ProjectSerializer(ProjectSerializer.setup_eager_loading(projects), many=True).data,
+                lambda: fast_serializers.serialize_projects(fast_serializers.project_values(projects)),
+            ),
+            (
+                'claims',
+                lambda: ProjectClaimSerializer(ProjectClaimSerializer.setup_eager_loading(claims), many=True).data,
+                lambda: fast_serializers.serialize_claims(fast_serializers.claim_values(claims)),
+            ),
+        ]
+        renderer = JSONRenderer()
+        for name, serializer, fast in cases:
+            if renderer.render(serializer()) != renderer.render(fast()):
+                raise CommandError(f'The fast path renders {name} differently from the serializer')
+            slow_time = self.time(lambda: renderer.render(serializer()), repeat)
+            fast_time = self.time(lambda: renderer.render(fast()), repeat)
+            self.stdout.write(
+                f'{name}: serializer {slow_time * 1000:.0f} ms, fast path {fast_time * 1000:.0f} ms '
+                f'({slow_time / fast_time:.1f}x faster)'
+            )
+
+    def time(self, run, repeat):
+        # Median of the runs, each covering the queries, the row rendering and the JSON encoding.
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
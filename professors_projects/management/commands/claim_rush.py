@@ -0,0 +1,79 @@
+import asyncio
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from professors_projects import loadtest
+from professors_projects.models import Student
+
+
+def milliseconds(seconds):
+    return '-' if seconds is None else f'{seconds * 1000:.0f}'
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay the claim-day rush against a running server: students log in, list available projects, '
+        'claim one and open their dashboard. Reports throughput, p50/p95/p99 latency and error rates per '
+        'endpoint, then checks the database for oversubscribed projects. Seed the accounts with seed_data '
+        'and the same --password first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Server to load, sharing this database')
+        parser.add_argument('--password', required=True, help='Password the student accounts were seeded with')
+        parser.add_argument('--students', type=int, default=3000, help='Students taking part')
+        parser.add_argument('--username-prefix', default='synthetic-student-', help='Which accounts to log in as')
+        parser.add_argument('--concurrency', type=int, default=200, help='Student sessions in flight at once')
+        parser.add_argument('--ramp', type=float, default=60, help='Seconds over which the students arrive')
+        parser.add_argument('--page-size', type=int, default=50, help='Projects each student sees before claiming')
+        parser.add_argument('--timeout', type=float, default=30, help='Seconds before a request counts as failed')
+        parser.add_argument('--seed', type=int, default=0, help='The same seed replays the same arrivals and choices')
+
+    def handle(self, *args, **kwargs):
+        if kwargs['concurrency'] < 1:
+            raise CommandError('--concurrency must be at least 1')
+        accounts = list(
+            Student.objects.filter(user__username__startswith=kwargs['username_prefix'])
+            .order_by('pk').values_list('user__username', 'suid')[:kwargs['students']]
+        )
+        if len(accounts) < kwargs['students']:
+            raise CommandError(
+                f"Only {len(accounts)} students match {kwargs['username_prefix']!r}; seed more with seed_data"
+            )
+
+        self.stdout.write(
+            f"{len(accounts)} students arriving over {kwargs['ramp']:g}s at {kwargs['url']}, "
+            f"at most {kwargs['concurrency']} at a time"
+        )
+        started_at = timezone.now()
+        report = asyncio.run(loadtest.claim_rush(
+            kwargs['url'], accounts, kwargs['password'], concurrency=kwargs['concurrency'], ramp=kwargs['ramp'],
+            seed=kwargs['seed'], page_size=kwargs['page_size'], timeout=kwargs['timeout'],
+        ))
+        self.print_report(report)
+
+        violations = {name: ids for name, ids in loadtest.oversubscription_violations(started_at).items() if ids}
+        if not violations:
+            self.stdout.write(self.style.SUCCESS('No oversubscription violations'))
+        for name, ids in violations.items():
+            shown = ', '.join(str(value) for value in ids[:10]) + (' ...' if len(ids) > 10 else '')
+            self.stdout.write(self.style.ERROR(f'{len(ids)} {name}: {shown}'))
+
+    def print_report(self, report):
+        rows = report.rows()
+        total = sum(row['requests'] for row in rows)
+        self.stdout.write(f'{total} requests in {report.duration:.1f}s ({total / report.duration:.1f}/s)')
+        self.stdout.write(
+            f"{'endpoint':<10} {'requests':>8} {'req/s':>7} {'ok':>6} {'4xx':>6} {'errors':>6} {'err%':>6} "
+            f"{'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7}"
+        )
+        for row in rows:
+            self.stdout.write(
+                f"{row['endpoint']:<10} {row['requests']:>8} {row['throughput']:>7.1f} {row['ok']:>6} "
+                f"{row['rejected']:>6} {row['errors']:>6} {row['error_rate']:>6.1%} {milliseconds(row['p50']):>7} "
+                f"{milliseconds(row['p95']):>7} {milliseconds(row['p99']):>7}"
+            )
+        for row in rows:
+            unusual = {outcome: count for outcome, count in row['outcomes'].items() if outcome != 200}
+            if unusual:
+                details = ', '.join(f'{outcome}: {count}' for outcome, count in sorted(unusual.items(), key=str))
+                self.stdout.write(f"{row['endpoint']} responses other than 200 - {details}")
@@ -0,0 +1,64 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+from professors_projects import uploads
+from professors_projects.models import Blob, Project
+from professors_projects.storage import project_file_storage
+
+class Command(BaseCommand):
+    help = (
+        'Delete stored project files that no project references any more, and chunked uploads left '
+        'unfinished for longer than PROJECT_FILE_UPLOAD_EXPIRY, and report the space reclaimed'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be deleted without deleting it')
+        parser.add_argument(
+            '--min-age', type=int, default=60,
+            help='Minutes a blob must have been unreferenced, so files from uploads still being saved are kept',
+        )
+
+    def handle(self, *args, **kwargs):
+        storage = project_file_storage()
+        cutoff = timezone.now() - timedelta(minutes=kwargs['min_age'])
+        candidates = list(Blob.objects.filter(ref_count=0, updated_at__lt=cutoff))
+
+        # The counters are only a hint: recount anything still referenced instead of deleting it.
+        referenced = dict(
+            Project.objects.filter(project_file__in=[blob.name for blob in candidates])
+            .values_list('project_file')
+            .annotate(count=Count('id'))
+        )
+        removed, reclaimed = 0, 0
+        for blob in candidates:
+            if blob.name in referenced:
+                self.stdout.write(f'{blob.name} is still referenced by {referenced[blob.name]} projects')
+                if not kwargs['dry_run']:
+                    Blob.objects.filter(pk=blob.pk).update(ref_count=referenced[blob.name])
+                continue
+
+            size = storage.size(blob.name) if storage.exists(blob.name) else 0
+            self.stdout.write(f'{blob.name}: {size} bytes')
+            if not kwargs['dry_run']:
+                # Only delete the row if nothing retained or pinned the blob since it was read. The
+                # row stays locked until the file is gone, so a save of the same bytes waits and
+                # writes the file again instead of reusing one about to disappear.
+                with transaction.atomic():
+                    if not Blob.objects.filter(pk=blob.pk, ref_count=0, updated_at__lt=cutoff).delete()[0]:
+                        continue
+                    storage.delete(blob.name)
+            removed += 1
+            reclaimed += size
+
+        expired, partials, partial_bytes = uploads.expire_sessions(dry_run=kwargs['dry_run'])
+        self.stdout.write(f'{expired} abandoned uploads, {partials} partial files: {partial_bytes} bytes')
+        removed += partials
+        reclaimed += partial_bytes
+
+        summary = f'{removed} unreferenced files, {reclaimed} bytes ({reclaimed / 1024 / 1024:.1f} MiB)'
+        if kwargs['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Would remove {summary}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Removed {summary}'))
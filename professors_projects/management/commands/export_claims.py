@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+from professors_projects import exports
+
+
+class Command(BaseCommand):
+    help = 'Stream claims, one row per student, as CSV or NDJSON; memory use does not grow with the table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(exports.EXPORT_FORMATS), default='csv', help='Output format')
+        parser.add_argument('--status', choices=exports.CLAIM_STATUSES, default='approved', help='Which claims to export')
+        parser.add_argument('--since', help='Only claims created on or after this date (YYYY-MM-DD)')
+        parser.add_argument('--until', help='Only claims created on or before this date (YYYY-MM-DD)')
+        parser.add_argument('--output', default='-', help='File to write, or - for standard output')
+        parser.add_argument('--chunk-size', type=int, default=exports.CHUNK_SIZE, help='Rows fetched from the database at a time')
+
+    def handle(self, *args, **kwargs):
+        try:
+            rows = exports.claim_rows(kwargs['status'], kwargs['since'], kwargs['until'])
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        to_stdout = kwargs['output'] == '-'
+        output = None if to_stdout else open(kwargs['output'], 'w', newline='', encoding='utf-8')
+        written = 0
+        try:
+            for line in exports.export_lines(rows, kwargs['format'], kwargs['chunk_size']):
+                if output is None:
+                    self.stdout.write(line, ending='')
+                else:
+                    output.write(line)
+                written += 1
+        finally:
+            if output is not None:
+                output.close()
+
+        if kwargs['format'] == 'csv':
+            written -= 1
+        # With the export itself on stdout, the summary goes to stderr to keep the file clean.
+        (self.stderr if to_stdout else self.stdout).write(
+            self.style.SUCCESS(f"Exported {written} rows of {kwargs['status']} claims")
+        )
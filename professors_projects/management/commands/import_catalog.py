@@ -0,0 +1,213 @@
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from professors_projects.models import Professor, Project, Student, ProjectIdsExhausted, bump_catalog_version
+
+USER_COLUMNS = ('username', 'email', 'first_name', 'last_name')
+# Columns that only live on User; the names are copied onto the profile too.
+USER_ONLY_COLUMNS = ('username', 'email')
+
+# For each kind: the profile model, the required columns and the optional ones.
+KINDS = {
+    'students': (Student, ('username', 'first_name', 'last_name', 'suid'), ('password', 'email', 'phone_number', 'year_attended')),
+    'professors': (Professor, ('username', 'first_name', 'last_name', 'suid'), ('password', 'email', 'phone_number')),
+    'projects': (Project, ('professor', 'title'), ('description', 'max_students')),
+}
+
+
+class RowError(Exception):
+    pass
+
+
+def read_csv(stream):
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_jsonl(stream):
+    for line_num, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            row = RowError(f'invalid JSON: {error}')
+        if not isinstance(row, (dict, RowError)):
+            row = RowError('each line must be a JSON object')
+        yield line_num, row
+
+
+def setup_worker():
+    # Spawned workers start without Django; forked ones already have it and setup() is a no-op.
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = (
+        'Import students, professors or projects from a CSV or JSON Lines file, in batches. '
+        'Invalid rows are reported and skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(KINDS), help='What the file contains')
+        parser.add_argument('path', help='CSV or .jsonl file to read, or - for standard input')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Input format; guessed from the file extension by default')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows validated and inserted together')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Processes hashing passwords; 1 hashes in this process',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Validate the file without importing anything')
+
+    def handle(self, *args, **kwargs):
+        kind, path = kwargs['kind'], kwargs['path']
+        input_format = kwargs['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        if kwargs['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        self.kind = kind
+        self.model, self.required, self.optional = KINDS[kind]
+        self.seen = {'username': set(), 'suid': set(), 'title': set()}
+        self.imported, self.skipped = 0, 0
+        self.workers = kwargs['workers']
+        self.executor = None
+        if kind != 'projects' and self.workers > 1 and not kwargs['dry_run']:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=setup_worker)
+
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8-sig')
+        started = time.monotonic()
+        try:
+            rows = read_jsonl(stream) if input_format == 'jsonl' else read_csv(stream)
+            while batch := list(islice(rows, kwargs['batch_size'])):
+                valid = self.validate(batch)
+                if valid and not kwargs['dry_run']:
+                    try:
+                        self.create(valid)
+                    except ProjectIdsExhausted as error:
+                        raise CommandError(str(error))
+                self.imported += len(valid)
+                elapsed = max(time.monotonic() - started, 1e-6)
+                self.stdout.write(
+                    f'{self.imported + self.skipped} rows read, {self.imported} valid, {self.skipped} skipped '
+                    f'({(self.imported + self.skipped) / elapsed:.0f} rows/s)'
+                )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            if self.executor is not None:
+                self.executor.shutdown()
+
+        if self.imported and not kwargs['dry_run']:
+            # bulk_create sends no post_save, so the catalog version is bumped once here instead.
+            bump_catalog_version()
+        elapsed = max(time.monotonic() - started, 1e-6)
+        summary = f'{self.imported} {kind} in {elapsed:.1f}s ({self.imported / elapsed:.0f}/s), {self.skipped} rows skipped'
+        if kwargs['dry_run']:
+            self.stdout.write(self.style.WARNING(f'Would import {summary}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Imported {summary}'))
+
+    def validate(self, batch):
+        """Clean each row against the model fields and return the valid ones; the rest are reported."""
+        cleaned = []
+        for line_num, row in batch:
+            try:
+                if isinstance(row, RowError):
+                    raise row
+                cleaned.append((line_num, self.clean_row(row)))
+            except RowError as error:
+                self.skip(line_num, error)
+
+        # Conflicts with rows already in the database are checked once per batch.
+        if self.kind == 'projects':
+            professors = Professor.objects.in_bulk([row['professor'] for _, row in cleaned], field_name='suid')
+            taken_titles = set(Project.objects.filter(title__in=[row['title'] for _, row in cleaned]).values_list('title', flat=True))
+        else:
+            taken_usernames = set(User.objects.filter(username__in=[row['username'] for _, row in cleaned]).values_list('username', flat=True))
+            taken_suids = set(self.model.objects.filter(suid__in=[row['suid'] for _, row in cleaned]).values_list('suid', flat=True))
+
+        valid = []
+        for line_num, row in cleaned:
+            try:
+                if self.kind == 'projects':
+                    if row['professor'] not in professors:
+                        raise RowError(f"no professor with suid {row['professor']}")
+                    row['professor'] = professors[row['professor']]
+                    self.check_unique('title', row['title'], taken_titles)
+                else:
+                    self.check_unique('username', row['username'], taken_usernames)
+                    self.check_unique('suid', row['suid'], taken_suids)
+            except RowError as error:
+                self.skip(line_num, error)
+                continue
+            valid.append(row)
+        return valid
+
+    def clean_row(self, row):
+        values = {}
+        for column in self.required + self.optional:
+            value = row.get(column)
+            value = value.strip() if isinstance(value, str) else value
+            if value in (None, ''):
+                if column in self.required:
+                    raise RowError(f'{column} is required')
+                continue
+            if column in ('password', 'professor'):
+                values[column] = str(value)
+                continue
+            model = User if column in USER_ONLY_COLUMNS else self.model
+            try:
+                values[column] = model._meta.get_field(column).clean(value, None)
+            except ValidationError as error:
+                raise RowError(f"{column}: {' '.join(error.messages)}")
+        if 'max_students' in values and values['max_students'] not in range(1, 5):
+            raise RowError('max_students must be between 1 and 4')
+        return values
+
+    def check_unique(self, column, value, taken):
+        if value in self.seen[column]:
+            raise RowError(f'{column} {value} appears earlier in the file')
+        if value in taken:
+            raise RowError(f'{column} {value} already exists')
+        self.seen[column].add(value)
+
+    def skip(self, line_num, error):
+        self.skipped += 1
+        self.stderr.write(f'line {line_num}: {error}')
+
+    def hash_passwords(self, passwords):
+        # Rows without a password get an unusable one; those users sign in after a reset.
+        if self.executor is None:
+            return [make_password(password) for password in passwords]
+        chunksize = max(1, len(passwords) // (self.workers * 4))
+        return list(self.executor.map(make_password, passwords, chunksize=chunksize))
+
+    @transaction.atomic
+    def create(self, rows):
+        if self.kind == 'projects':
+            project_ids = Project.allocate_project_ids(len(rows))
+            Project.objects.bulk_create(
+                Project(project_id=project_id, **row) for project_id, row in zip(project_ids, rows)
+            )
+            return
+
+        passwords = self.hash_passwords([row.pop('password', None) for row in rows])
+        users = User.objects.bulk_create(
+            User(password=password, **{column: row[column] for column in USER_COLUMNS if column in row})
+            for password, row in zip(passwords, rows)
+        )
+        self.model.objects.bulk_create(
+            self.model(user=user, **{column: value for column, value in row.items() if column not in USER_ONLY_COLUMNS})
+            for user, row in zip(users, rows)
+        )
@@ -0,0 +1,15 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from professors_projects import search
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index over project titles, descriptions and professor names'
+
+    def handle(self, *args, **kwargs):
+        if not search.is_supported():
+            raise CommandError('The full-text search index is only available on SQLite')
+
+        started = time.monotonic()
+        indexed = search.rebuild_index()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} projects in {elapsed:.2f}s'))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from professors_projects.models import Project
+
+class Command(BaseCommand):
+    help = 'Recompute Project.claimed_count and pending_claims_count from the claim tables and report any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Projects fixed per UPDATE')
+
+    def handle(self, *args, **kwargs):
+        drifted_ids = []
+        projects = (
+            Project.objects.annotate_actual_counts()
+            .only('id', 'project_id', 'claimed_count', 'pending_claims_count')
+            .order_by('id')
+        )
+        for project in projects.iterator(chunk_size=kwargs['batch_size']):
+            if (project.claimed_count, project.pending_claims_count) == (project.actual_claimed, project.actual_pending):
+                continue
+            self.stdout.write(
+                f'Project {project.project_id}: claimed_count {project.claimed_count} -> {project.actual_claimed}, '
+                f'pending_claims_count {project.pending_claims_count} -> {project.actual_pending}'
+            )
+            drifted_ids.append(project.id)
+
+        if not drifted_ids:
+            self.stdout.write(self.style.SUCCESS('All project counters are consistent'))
+            return
+        if kwargs['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(drifted_ids)} projects have drifted counters (dry run, nothing changed)'))
+            return
+
+        batch_size = kwargs['batch_size']
+        for start in range(0, len(drifted_ids), batch_size):
+            Project.objects.filter(pk__in=drifted_ids[start:start + batch_size]).reset_counts()
+        self.stdout.write(self.style.SUCCESS(f'Fixed counters on {len(drifted_ids)} projects'))
@@ -0,0 +1,214 @@
+import random
+import time
+from datetime import timedelta
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from professors_projects.models import (
+    Blob, Professor, Project, Student, ProjectClaim, ProjectClaimRelation, ProjectIdsExhausted, bump_catalog_version,
+)
+from professors_projects.storage import project_file_storage
+
+FIRST_NAMES = (
+    'Ali', 'Amir', 'Ana', 'Arash', 'Ben', 'Chen', 'Dana', 'Darius', 'Elena', 'Farah', 'Hana', 'Ivan', 'Javad',
+    'Kian', 'Lena', 'Leila', 'Mahsa', 'Maria', 'Mehdi', 'Mina', 'Nadia', 'Navid', 'Omid', 'Parisa', 'Reza',
+    'Sara', 'Shirin', 'Sina', 'Tara', 'Yasmin', 'Yusuf', 'Zahra',
+)
+LAST_NAMES = (
+    'Abbasi', 'Ahmadi', 'Bahrami', 'Chen', 'Ebrahimi', 'Farahani', 'Ghorbani', 'Hashemi', 'Hosseini', 'Jafari',
+    'Karimi', 'Kazemi', 'Lopez', 'Mohammadi', 'Moradi', 'Mousavi', 'Najafi', 'Novak', 'Rahimi', 'Rezaei',
+    'Sadeghi', 'Salehi', 'Smith', 'Tehrani', 'Yousefi', 'Zamani',
+)
+TOPICS = (
+    'compiler', 'scheduler', 'recommendation engine', 'chat application', 'image classifier', 'IoT gateway',
+    'search engine', 'payment system', 'game engine', 'file synchronizer', 'robot controller', 'database',
+    'web crawler', 'music player', 'traffic simulator', 'library catalogue', 'exam proctoring tool',
+)
+QUALIFIERS = (
+    'Distributed', 'Secure', 'Real-time', 'Mobile', 'Energy-aware', 'Offline-first', 'Accessible', 'Scalable',
+    'Privacy-preserving', 'Low-latency', 'Open-source', 'Collaborative',
+)
+# Share of projects taking each group size.
+MAX_STUDENTS_WEIGHTS = {1: 10, 2: 35, 3: 35, 4: 20}
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate professors, students, projects and pending/approved claims for load tests and benchmarks. '
+        'The same --seed always produces the same names, groups and claims.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--professors', type=int, default=50)
+        parser.add_argument('--students', type=int, default=2000)
+        parser.add_argument('--projects', type=int, default=400)
+        parser.add_argument('--seed', type=int, default=0, help='The same seed generates the same dataset')
+        parser.add_argument('--claim-rate', type=float, default=0.8, help='Share of students in a claiming group')
+        parser.add_argument('--approved', type=float, default=0.4, help='Share of groups with an approved claim')
+        parser.add_argument('--files', type=float, default=0.5, help='Share of approved projects with an uploaded file')
+        parser.add_argument(
+            '--password', default='',
+            help='Password for every generated user, hashed once and shared; without it the accounts cannot log in',
+        )
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per INSERT')
+
+    def handle(self, *args, **kwargs):
+        if kwargs['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        if kwargs['projects'] and not kwargs['professors']:
+            raise CommandError('Projects need at least one professor')
+        self.rng = random.Random(kwargs['seed'])
+        self.batch_size = kwargs['batch_size']
+        self.now = timezone.now()
+        self.started = time.monotonic()
+        if (
+            User.objects.filter(username__startswith='synthetic-').exists()
+            or Student.objects.filter(suid__regex=r'^S[0-9]{9}$').exists()
+            or Professor.objects.filter(suid__regex=r'^P[0-9]{9}$').exists()
+        ):
+            raise CommandError('This database already holds generated users; flush it before seeding again')
+
+        with transaction.atomic():
+            password = make_password(kwargs['password'] or None)
+            professors = self.create_people(Professor, 'professor', 'P', kwargs['professors'], password)
+            try:
+                projects = self.create_projects(professors, kwargs['projects'])
+            except ProjectIdsExhausted as error:
+                raise CommandError(str(error))
+            students = self.create_people(Student, 'student', 'S', kwargs['students'], password)
+            self.create_claims(projects, students, kwargs['claim_rate'], kwargs['approved'], kwargs['files'])
+            bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f'Seeded the catalog in {time.monotonic() - self.started:.1f}s'))
+
+    def progress(self, message):
+        self.stdout.write(f'{message} ({time.monotonic() - self.started:.1f}s)')
+
+    def person_name(self):
+        return self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+
+    def create_people(self, model, role, suid_prefix, count, password):
+        names = [self.person_name() for _ in range(count)]
+        users = User.objects.bulk_create(
+            (
+                User(
+                    username=f'synthetic-{role}-{n}', email=f'{role}{n}@example.edu', password=password,
+                    first_name=first, last_name=last,
+                )
+                for n, (first, last) in enumerate(names)
+            ),
+            batch_size=self.batch_size,
+        )
+        extra = (lambda: {'year_attended': self.rng.randint(2019, 2024)}) if model is Student else dict
+        people = model.objects.bulk_create(
+            (
+                model(
+                    user=user, first_name=first, last_name=last, suid=f'{suid_prefix}{n:09d}',
+                    phone_number=f'09{self.rng.randrange(10 ** 9):09d}', **extra(),
+                )
+                for n, (user, (first, last)) in enumerate(zip(users, names))
+            ),
+            batch_size=self.batch_size,
+        )
+        self.progress(f'Created {count} {role}s')
+        return people
+
+    def create_projects(self, professors, count):
+        # A few professors supervise many projects; most supervise a handful.
+        weights = [1 / (rank + 1) for rank in range(len(professors))]
+        supervisors = self.rng.choices(professors, weights=weights, k=count)
+        sizes = self.rng.choices(list(MAX_STUDENTS_WEIGHTS), weights=list(MAX_STUDENTS_WEIGHTS.values()), k=count)
+        titles = set()
+        projects = []
+        for professor, max_students, project_id in zip(supervisors, sizes, Project.allocate_project_ids(count)):
+            title = f'{self.rng.choice(QUALIFIERS)} {self.rng.choice(TOPICS)}'
+            # Titles are unique in practice (CreateProjectView enforces it), so number the repeats.
+            base, repeat = title, 1
+            while title in titles:
+                repeat += 1
+                title = f'{base} {repeat}'
+            titles.add(title)
+            projects.append(Project(
+                professor=professor, project_id=project_id, title=title, max_students=max_students,
+                description=f'Design and build a {title.lower()}, supervised by {professor.last_name}.',
+            ))
+        projects = Project.objects.bulk_create(projects, batch_size=self.batch_size)
+        self.progress(f'Created {count} projects')
+        return projects
+
+    def create_claims(self, projects, students, claim_rate, approved_rate, file_rate):
+        if not projects:
+            return
+        claimants = [student for student in students if self.rng.random() < claim_rate]
+        self.rng.shuffle(claimants)
+        # Popularity is heavily skewed, so the top projects collect far more claims than places.
+        popularity = [1 / (rank + 1) ** 0.8 for rank in range(len(projects))]
+        ranked = projects[:]
+        self.rng.shuffle(ranked)
+
+        claims, memberships, relations, files = [], [], [], []
+        approved_projects = set()
+        position = 0
+        while position < len(claimants):
+            choices = self.rng.choices(ranked, weights=popularity, k=self.rng.randint(1, 3))
+            size = self.rng.randint(1, max(project.max_students for project in choices))
+            group = claimants[position:position + size]
+            position += size
+
+            wanted = list({project.pk: project for project in choices if len(group) <= project.max_students}.values())
+            if not wanted:
+                continue
+            winner = None
+            if self.rng.random() < approved_rate:
+                winner = next((project for project in wanted if project.pk not in approved_projects), None)
+            if winner is not None:
+                # An approved group keeps only that claim, as ProjectClaim.approve leaves it.
+                approved_projects.add(winner.pk)
+                wanted = [winner]
+                approved_at = self.now - timedelta(minutes=self.rng.randrange(14 * 24 * 60))
+                winner.is_available = False
+                winner.claimed_at = approved_at
+                winner.claimed_count = len(group)
+                relations += [ProjectClaimRelation(project=winner, student=student) for student in group]
+                if self.rng.random() < file_rate:
+                    files.append(winner)
+            for project in wanted:
+                if project is winner:
+                    claim = ProjectClaim(project=project, is_approved=True, approved_at=approved_at)
+                else:
+                    claim = ProjectClaim(project=project)
+                    project.pending_claims_count += 1
+                claims.append((claim, group))
+
+        created = ProjectClaim.objects.bulk_create([claim for claim, _ in claims], batch_size=self.batch_size)
+        for claim, (_, group) in zip(created, claims):
+            memberships += [ProjectClaim.students.through(projectclaim=claim, student=student) for student in group]
+        ProjectClaim.students.through.objects.bulk_create(memberships, batch_size=self.batch_size)
+        ProjectClaimRelation.objects.bulk_create(relations, batch_size=self.batch_size)
+        self.progress(f'Created {len(created)} claims, {len(approved_projects)} approved')
+
+        self.attach_files(files)
+        Project.objects.bulk_update(
+            projects,
+            [
+                'is_available', 'claimed_at', 'claimed_count', 'pending_claims_count',
+                'project_file', 'project_file_name', 'file_upload_date',
+            ],
+            batch_size=self.batch_size,
+        )
+        oversubscribed = sum(
+            1 for project in projects if project.claimed_count + project.pending_claims_count > project.max_students
+        )
+        self.progress(f'Uploaded {len(files)} project files; {oversubscribed} projects are oversubscribed')
+
+    def attach_files(self, projects):
+        storage = project_file_storage()
+        for project in projects:
+            line = f'Final report for project {project.project_id}: {project.title}\n'
+            content = ContentFile(line.encode() * self.rng.randint(1, 200))
+            project.project_file.name = storage.save('project_files/final-report.pdf', content)
+            project.project_file_name = f'{project.project_id}-final-report.pdf'
+            project.file_upload_date = project.claimed_at + timedelta(days=self.rng.randint(1, 30))
+            Blob.retain(project.project_file.name)
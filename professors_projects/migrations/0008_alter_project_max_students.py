@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2024-05-25 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("professors_projects", "0007_alter_project_project_id"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="project",
+            name="max_students",
+            field=models.PositiveIntegerField(default=2),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.1 on 2024-05-26 11:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("professors_projects", "0008_alter_project_max_students"),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name="professor",
+            old_name="professor_id",
+            new_name="suid",
+        ),
+        migrations.RenameField(
+            model_name="student",
+            old_name="student_id",
+            new_name="suid",
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2024-05-27 14:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("professors_projects", "0009_rename_professor_id_professor_suid_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="file_upload_date",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
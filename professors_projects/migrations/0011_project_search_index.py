@@ -0,0 +1,80 @@
+from django.db import migrations
+
+FTS_TABLE = "professors_projects_project_fts"
+
+CREATE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, description, professor_name,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    f"""
+    INSERT INTO {FTS_TABLE} (rowid, title, description, professor_name)
+    SELECT p.id, p.title, p.description, prof.first_name || ' ' || prof.last_name
+    FROM professors_projects_project p
+    JOIN professors_projects_professor prof ON prof.id = p.professor_id
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_project_insert AFTER INSERT ON professors_projects_project BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, title, description, professor_name)
+        SELECT new.id, new.title, new.description, prof.first_name || ' ' || prof.last_name
+        FROM professors_projects_professor prof WHERE prof.id = new.professor_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_project_update
+    AFTER UPDATE OF title, description, professor_id ON professors_projects_project BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE} (rowid, title, description, professor_name)
+        SELECT new.id, new.title, new.description, prof.first_name || ' ' || prof.last_name
+        FROM professors_projects_professor prof WHERE prof.id = new.professor_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_project_delete AFTER DELETE ON professors_projects_project BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_professor_update
+    AFTER UPDATE OF first_name, last_name ON professors_projects_professor BEGIN
+        UPDATE {FTS_TABLE} SET professor_name = new.first_name || ' ' || new.last_name
+        WHERE rowid IN (SELECT id FROM professors_projects_project WHERE professor_id = new.id);
+    END
+    """,
+]
+
+DROP_SQL = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_professor_update",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_project_delete",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_project_update",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_project_insert",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite-only; other backends keep the icontains search in ProjectSearchView.
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in CREATE_SQL:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in DROP_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("professors_projects", "0010_project_file_upload_date"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.0.1 on 2026-10-18 16:24
+
+from django.db import migrations, models
+
+MIN_PROJECT_ID = 1000
+MAX_PROJECT_ID = 9999
+
+
+def seed_project_id_sequence(apps, schema_editor):
+    # Continue numbering after the highest existing id and record the gaps below it as reusable.
+    Project = apps.get_model("professors_projects", "Project")
+    Sequence = apps.get_model("professors_projects", "Sequence")
+    FreedProjectId = apps.get_model("professors_projects", "FreedProjectId")
+
+    used = {
+        int(project_id)
+        for project_id in Project.objects.values_list("project_id", flat=True)
+        if project_id.isdigit()
+    }
+    last_value = max(used, default=MIN_PROJECT_ID - 1)
+    Sequence.objects.create(name="project_id", last_value=last_value)
+    FreedProjectId.objects.bulk_create(
+        FreedProjectId(project_id=str(value))
+        for value in range(MIN_PROJECT_ID, min(last_value, MAX_PROJECT_ID) + 1)
+        if value not in used
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("professors_projects", "0011_project_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FreedProjectId",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("project_id", models.CharField(max_length=4, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="Sequence",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=50, primary_key=True, serialize=False),
+                ),
+                ("last_value", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(seed_project_id_sequence, migrations.RunPython.noop),
+    ]
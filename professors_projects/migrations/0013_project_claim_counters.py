@@ -0,0 +1,101 @@
+# Generated by Django 5.0.1 on 2026-10-18 16:31
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+FTS_TABLE = "professors_projects_project_fts"
+
+# The triggers as 0011 created them, restored when migrating back past this migration.
+TRIGGER_SQL = [
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_project_insert AFTER INSERT ON professors_projects_project BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, title, description, professor_name)
+        SELECT new.id, new.title, new.description, prof.first_name || ' ' || prof.last_name
+        FROM professors_projects_professor prof WHERE prof.id = new.professor_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_project_update
+    AFTER UPDATE OF title, description, professor_id ON professors_projects_project BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE} (rowid, title, description, professor_name)
+        SELECT new.id, new.title, new.description, prof.first_name || ' ' || prof.last_name
+        FROM professors_projects_professor prof WHERE prof.id = new.professor_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_project_delete AFTER DELETE ON professors_projects_project BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER {FTS_TABLE}_professor_update
+    AFTER UPDATE OF first_name, last_name ON professors_projects_professor BEGIN
+        UPDATE {FTS_TABLE} SET professor_name = new.first_name || ' ' || new.last_name
+        WHERE rowid IN (SELECT id FROM professors_projects_project WHERE professor_id = new.id);
+    END
+    """,
+]
+
+
+def drop_search_triggers(apps, schema_editor):
+    # Adding columns makes SQLite rebuild the project table, which breaks the index triggers from
+    # 0011. The index is kept in sync by signals from here on.
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for trigger in ("professor_update", "project_delete", "project_update", "project_insert"):
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_{trigger}")
+
+
+def create_search_triggers(apps, schema_editor):
+    # Runs after the counter columns are removed again, so the triggers land on the rebuilt table.
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for statement in TRIGGER_SQL:
+        schema_editor.execute(statement)
+
+
+def backfill_counters(apps, schema_editor):
+    Project = apps.get_model("professors_projects", "Project")
+    ProjectClaim = apps.get_model("professors_projects", "ProjectClaim")
+    ProjectClaimRelation = apps.get_model("professors_projects", "ProjectClaimRelation")
+
+    claimed = (
+        ProjectClaimRelation.objects.filter(project=OuterRef("pk"))
+        .values("project")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    pending = (
+        ProjectClaim.objects.filter(project=OuterRef("pk"), is_approved=False)
+        .values("project")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    Project.objects.update(
+        claimed_count=Coalesce(Subquery(claimed), 0),
+        pending_claims_count=Coalesce(Subquery(pending), 0),
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("professors_projects", "0012_project_id_sequence"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_search_triggers, create_search_triggers),
+        migrations.AddField(
+            model_name="project",
+            name="claimed_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="pending_claims_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
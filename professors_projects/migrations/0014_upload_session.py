@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-18 16:40
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("professors_projects", "0013_project_claim_counters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UploadSession",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("filename", models.CharField(max_length=255)),
+                ("size", models.BigIntegerField()),
+                ("received", models.BigIntegerField(default=0)),
+                ("sha256", models.CharField(blank=True, max_length=64)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+                ("project", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="professors_projects.project")),
+                ("student", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to="professors_projects.student")),
+            ],
+        ),
+    ]
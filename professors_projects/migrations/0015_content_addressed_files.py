@@ -0,0 +1,76 @@
+# Generated by Django 5.0.1 on 2026-10-18 16:42
+
+import os
+
+import professors_projects.storage
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def track_existing_files(apps, schema_editor):
+    # Files uploaded before content addressing keep their names; record them as blobs so that
+    # replacing them releases the old file for collection like any other.
+    Project = apps.get_model("professors_projects", "Project")
+    Blob = apps.get_model("professors_projects", "Blob")
+    storage = professors_projects.storage.project_file_storage()
+
+    for project in Project.objects.exclude(project_file="").exclude(project_file=None).only("id", "project_file"):
+        Project.objects.filter(pk=project.pk).update(project_file_name=os.path.basename(project.project_file.name))
+
+    references = (
+        Project.objects.exclude(project_file="")
+        .exclude(project_file=None)
+        .values("project_file")
+        .annotate(ref_count=Count("id"))
+    )
+    Blob.objects.bulk_create(
+        Blob(
+            name=row["project_file"],
+            size=storage.size(row["project_file"]) if storage.exists(row["project_file"]) else 0,
+            ref_count=row["ref_count"],
+        )
+        for row in references
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("professors_projects", "0014_upload_session"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Blob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=255, unique=True)),
+                ("size", models.BigIntegerField(default=0)),
+                ("ref_count", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name="project",
+            name="project_file_name",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name="project",
+            name="project_file",
+            field=models.FileField(
+                blank=True,
+                null=True,
+                storage=professors_projects.storage.project_file_storage,
+                upload_to="project_files/",
+            ),
+        ),
+        migrations.RunPython(track_existing_files, migrations.RunPython.noop),
+    ]
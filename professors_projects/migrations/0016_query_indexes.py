@@ -0,0 +1,43 @@
+# Generated by Django 5.0.1 on 2026-10-18 16:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("professors_projects", "0015_content_addressed_files"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(condition=models.Q(("is_available", True)), fields=["id"], name="project_available_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(condition=models.Q(("is_available", False)), fields=["id"], name="project_taken_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(
+                condition=models.Q(("is_available", False), models.Q(("project_file", ""), _negated=True)),
+                fields=["id"],
+                name="project_completed_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(fields=["max_students", "id"], name="project_capacity_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="project",
+            index=models.Index(
+                condition=models.Q(("is_available", True)), fields=["max_students", "id"], name="project_available_capacity_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="projectclaim",
+            index=models.Index(fields=["project", "is_approved"], name="claim_project_approved_idx"),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.1 on 2026-10-18 19:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("professors_projects", "0017_uploadsession_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -1,6 +1,13 @@
-from django.db import models
+import hashlib
+import random
+import uuid
+from django.db import models, transaction
 from django.contrib.auth.models import User
-from django.db.models import Max
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .events import project_changed
+from . import search
+from .storage import project_file_storage
 
 class Professor(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -12,6 +19,15 @@ class Professor(models.Model):
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
+class StudentQuerySet(models.QuerySet):
+    def resolve(self, suids):
+        """Look up students by suid in one query, returning (students, invalid_suids) in request order."""
+        suids = list(dict.fromkeys(str(suid) for suid in suids))
+        found = {student.suid: student for student in self.filter(suid__in=suids)}
+        students = [found[suid] for suid in suids if suid in found]
+        invalid_suids = [suid for suid in suids if suid not in found]
+        return students, invalid_suids
+
 class Student(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     first_name = models.CharField(max_length=100, default='')
@@ -20,12 +36,104 @@ class Student(models.Model):
     phone_number = models.CharField(max_length=15, default='')
     year_attended = models.PositiveIntegerField(default=0)
 
+    objects = StudentQuerySet.as_manager()
+
     def get_full_name(self):
         return f"{self.first_name} {self.last_name}"
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} {self.suid}"
 
+class Sequence(models.Model):
+    """A named counter whose values are handed out atomically, in blocks if needed."""
+    name = models.CharField(max_length=50, primary_key=True)
+    last_value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_value}"
+
+    @classmethod
+    def next_block(cls, name, size=1, start=1):
+        """Reserve the next `size` values of the named sequence and return them as a range."""
+        with transaction.atomic():
+            # Increment first: the UPDATE takes the write lock, so concurrent callers get disjoint blocks.
+            if not cls.objects.filter(name=name).update(last_value=models.F('last_value') + size):
+                cls.objects.get_or_create(name=name, defaults={'last_value': start - 1})
+                cls.objects.filter(name=name).update(last_value=models.F('last_value') + size)
+            last_value = cls.objects.get(name=name).last_value
+        return range(last_value - size + 1, last_value + 1)
+
+CATALOG_VERSION = 'catalog_version'
+
+def get_catalog_version():
+    """Version of everything the public listings show; it changes on every catalog write."""
+    return Sequence.objects.filter(name=CATALOG_VERSION).values_list('last_value', flat=True).first() or 0
+
+async def aget_catalog_version():
+    return await Sequence.objects.filter(name=CATALOG_VERSION).values_list('last_value', flat=True).afirst() or 0
+
+def bump_catalog_version():
+    if not Sequence.objects.filter(name=CATALOG_VERSION).update(last_value=models.F('last_value') + 1):
+        # Start from a random point so a rolled-back or restored database never reuses a version
+        # whose responses an in-process cache may still hold.
+        Sequence.next_block(CATALOG_VERSION, start=random.randrange(1, 2 ** 48))
+
+class FreedProjectId(models.Model):
+    """A project_id released by a deleted project, reusable once the sequence runs out."""
+    project_id = models.CharField(max_length=4, unique=True)
+
+    def __str__(self):
+        return self.project_id
+
+class ProjectIdsExhausted(Exception):
+    pass
+
+class ProjectAlreadyClaimed(Exception):
+    pass
+
+class ProjectQuerySet(models.QuerySet):
+    @staticmethod
+    def actual_counts():
+        """Subquery expressions recounting claimed_count and pending_claims_count from the claim tables."""
+        claimed = (
+            ProjectClaimRelation.objects.filter(project=models.OuterRef('pk'))
+            .values('project').annotate(total=models.Count('pk')).values('total')
+        )
+        pending = (
+            ProjectClaim.objects.filter(project=models.OuterRef('pk'), is_approved=False)
+            .values('project').annotate(total=models.Count('pk')).values('total')
+        )
+        return {
+            'claimed_count': Coalesce(models.Subquery(claimed), 0),
+            'pending_claims_count': Coalesce(models.Subquery(pending), 0),
+        }
+
+    def annotate_actual_counts(self):
+        counts = self.actual_counts()
+        return self.annotate(actual_claimed=counts['claimed_count'], actual_pending=counts['pending_claims_count'])
+
+    def reset_counts(self):
+        # Recounted inside the UPDATE itself, so claims landing while drift is being scanned are not lost.
+        return self.update(**self.actual_counts())
+
+    # Bulk writes send no post_save, so they keep the search index in step themselves; bulk_update
+    # goes through update(). Counter and availability updates skip the extra query.
+    def update(self, **kwargs):
+        if not search.INDEXED_FIELDS & set(kwargs):
+            return super().update(**kwargs)
+        kwargs.setdefault('updated_at', timezone.now())
+        with transaction.atomic(using=self.db):
+            project_ids = list(self.values_list('pk', flat=True))
+            updated = super().update(**kwargs)
+            search.index_projects(project_ids)
+        return updated
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db):
+            projects = super().bulk_create(objs, *args, **kwargs)
+            search.index_projects(project.pk for project in projects if project.pk is not None)
+        return projects
+
 class Project(models.Model):
     professor = models.ForeignKey(Professor, on_delete=models.CASCADE)
     title = models.CharField(max_length=100)
@@ -35,27 +143,87 @@ class Project(models.Model):
     is_available = models.BooleanField(default=True)
     claimed_by = models.ManyToManyField(Student, through='ProjectClaimRelation')
     claimed_at = models.DateTimeField(null=True, blank=True)
-    project_file = models.FileField(upload_to='project_files/', null=True, blank=True)
+    project_file = models.FileField(upload_to='project_files/', storage=project_file_storage, null=True, blank=True)
+    # Stored files are named by content hash, so the name the group uploaded is kept here for downloads.
+    project_file_name = models.CharField(max_length=255, blank=True)
     file_upload_date = models.DateTimeField(null=True, blank=True)
+    # Maintained incrementally (see signals.py and ProjectClaim.approve); reconcile_project_counters repairs drift.
+    claimed_count = models.PositiveIntegerField(default=0)
+    pending_claims_count = models.PositiveIntegerField(default=0)
+    # Moves on edits the dashboards show; claim and counter changes are tracked from the claim tables.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ProjectQuerySet.as_manager()
+
+    class Meta:
+        # SQLite compiles is_available=True to a bare "is_available" term, which cannot drive an
+        # index lookup, so availability is matched through partial indexes and id trails each one
+        # for the cursor pagination.
+        indexes = [
+            models.Index(fields=['id'], name='project_available_idx', condition=models.Q(is_available=True)),
+            models.Index(fields=['id'], name='project_taken_idx', condition=models.Q(is_available=False)),
+            models.Index(
+                fields=['id'], name='project_completed_idx',
+                condition=models.Q(is_available=False) & ~models.Q(project_file=''),
+            ),
+            models.Index(fields=['max_students', 'id'], name='project_capacity_idx'),
+            models.Index(
+                fields=['max_students', 'id'], name='project_available_capacity_idx', condition=models.Q(is_available=True)
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored file name, so a save that replaces the file can release the old blob.
+        instance._loaded_project_file = instance.__dict__.get('project_file')
+        return instance
+
+    PROJECT_ID_SEQUENCE = 'project_id'
+    MIN_PROJECT_ID = 1000
+    MAX_PROJECT_ID = 9999
+
     def save(self, *args, **kwargs):
-        if not self.project_id:
-            last_project_id = Project.objects.aggregate(Max('project_id'))['project_id__max']
-            if last_project_id:
-                new_project_id = int(last_project_id) + 1
-                if new_project_id > 9999:
-                    new_project_id = 1000
-                self.project_id = str(new_project_id)
-            else:
-                self.project_id = '1000'
-        super().save(*args, **kwargs)
+        # One transaction for the id allocation, the row and the post_save search-index update; its
+        # first statement is a write, so SQLite takes the write lock before anything reads.
+        with transaction.atomic():
+            if not self.project_id:
+                self.project_id = Project.allocate_project_ids()[0]
+            super().save(*args, **kwargs)
+
+    @classmethod
+    def allocate_project_ids(cls, count=1):
+        """
+        Reserve `count` unused project ids. Fresh ids come from the project_id sequence; once the
+        four-digit space is used up, ids released by deleted projects are handed out instead.
+        """
+        with transaction.atomic():
+            block = Sequence.next_block(cls.PROJECT_ID_SEQUENCE, count, start=cls.MIN_PROJECT_ID)
+            project_ids = [str(value) for value in block if value <= cls.MAX_PROJECT_ID]
+
+            missing = count - len(project_ids)
+            if missing:
+                # Still under the sequence's lock, so no other allocator can take the same freed ids.
+                freed = list(FreedProjectId.objects.order_by('project_id').values_list('project_id', flat=True)[:missing])
+                if len(freed) < missing:
+                    raise ProjectIdsExhausted(f'Only {len(project_ids) + len(freed)} of {count} project ids are available')
+                FreedProjectId.objects.filter(project_id__in=freed).delete()
+                project_ids.extend(freed)
+        return project_ids
+
+    @classmethod
+    def lock(cls, pk):
+        # SQLite ignores SELECT ... FOR UPDATE, so take the write lock with a no-op UPDATE
+        # instead; on other backends the same statement row-locks the project.
+        cls.objects.filter(pk=pk).update(max_students=models.F('max_students'))
+        return cls.objects.get(pk=pk)
 
     def update_availability(self):
-        self.is_available = self.claimed_by.count() < self.max_students
-        self.save()
+        self.is_available = self.claimed_count < self.max_students
+        self.save(update_fields=['is_available'])
 
 class ProjectClaim(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
@@ -64,6 +232,65 @@ class ProjectClaim(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     approved_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'is_approved'], name='claim_project_approved_idx'),
+        ]
+
+    def approve(self):
+        """
+        Approve the claim, assign its students to the project and delete their competing claims.
+        Returns the ids of the deleted claims, or None if the claim had already been approved.
+        Raises ProjectAlreadyClaimed, leaving the claim pending, when the project is closed or
+        has no room left for the group.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            # Lock before reading: on SQLite a transaction that reads first cannot upgrade to a
+            # writer while another approval holds the lock, and fails instead of waiting.
+            Project.lock(self.project_id)
+            student_ids = list(self.students.values_list('id', flat=True))
+            already_assigned = set(
+                ProjectClaimRelation.objects.filter(project_id=self.project_id, student_id__in=student_ids)
+                .values_list('student_id', flat=True)
+            )
+            new_relations = [
+                ProjectClaimRelation(project_id=self.project_id, student_id=student_id)
+                for student_id in student_ids if student_id not in already_assigned
+            ]
+            # The guarded update admits one approval per project; bulk_create sends no signals, so
+            # the counters move here too.
+            closed = Project.objects.filter(
+                pk=self.project_id,
+                is_available=True,
+                claimed_count__lte=models.F('max_students') - len(new_relations),
+            ).update(
+                is_available=False,
+                claimed_at=now,
+                claimed_count=models.F('claimed_count') + len(new_relations),
+                pending_claims_count=models.F('pending_claims_count') - 1,
+            )
+            if not closed:
+                if ProjectClaim.objects.filter(pk=self.pk, is_approved=True).exists():
+                    return None
+                raise ProjectAlreadyClaimed(f'Project {self.project_id} is already claimed')
+            if not ProjectClaim.objects.filter(pk=self.pk, is_approved=False).update(is_approved=True, approved_at=now):
+                transaction.set_rollback(True)
+                return None
+            ProjectClaimRelation.objects.bulk_create(new_relations)
+            bump_catalog_version()
+
+            competing = dict(
+                ProjectClaim.objects.filter(students__in=student_ids).exclude(pk=self.pk).values_list('pk', 'project_id')
+            )
+            competing_ids = list(competing)
+            ProjectClaim.objects.filter(pk__in=competing_ids).delete()
+            project_changed(self.project_id, *set(competing.values()))
+
+        self.is_approved = True
+        self.approved_at = now
+        return competing_ids
+
     def __str__(self):
         students_str = ', '.join([student.suid for student in self.students.all()])
         return f"Students: {students_str} - Project: {self.project.title}"
@@ -74,3 +301,87 @@ class ProjectClaimRelation(models.Model):
 
     class Meta:
         unique_together = ('project', 'student')
+
+def dashboard_marker_aggregates(role, profile):
+    # Counts and latest values over what the dashboard shows, so a claim made, approved or
+    # withdrawn, a student assigned, or a project edited, closed or given a file changes one.
+    if role == 'professor':
+        queryset, project, claim = Project.objects.filter(professor=profile), '', 'projectclaim__'
+    else:
+        queryset, project, claim = ProjectClaim.objects.filter(students=profile), 'project__', ''
+    return queryset, {
+        'projects': models.Count(f'{project}id', distinct=True),
+        'edited': models.Max(f'{project}updated_at'),
+        'closed': models.Max(f'{project}claimed_at'),
+        'claims': models.Count(f'{claim}id', distinct=True),
+        'last_claim': models.Max(f'{claim}id'),
+        'approved': models.Max(f'{claim}approved_at'),
+        'assigned': models.Count(f'{project}projectclaimrelation', distinct=True),
+        'last_assigned': models.Max(f'{project}projectclaimrelation__id'),
+    }
+
+def marker_digest(values):
+    return hashlib.sha1(repr(sorted(values.items())).encode()).hexdigest()[:16]
+
+def dashboard_marker(role, profile):
+    """Changes whenever the role's dashboard for profile would, but not on other users' claims."""
+    queryset, aggregates = dashboard_marker_aggregates(role, profile)
+    return marker_digest(queryset.aggregate(**aggregates))
+
+async def adashboard_marker(role, profile):
+    queryset, aggregates = dashboard_marker_aggregates(role, profile)
+    return marker_digest(await queryset.aaggregate(**aggregates))
+
+class UploadSession(models.Model):
+    """A chunked upload of a project file; the bytes received so far live in uploads.partial_path()."""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE)
+    student = models.ForeignKey(Student, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    received = models.BigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Moves with every chunk; uploads idle for PROJECT_FILE_UPLOAD_EXPIRY are deleted by collect_project_files.
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size}) - Project: {self.project_id}"
+
+class Blob(models.Model):
+    """
+    A stored project file and the number of projects referencing it. Blobs that drop to zero
+    references are deleted by the collect_project_files command.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    size = models.BigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @classmethod
+    def pin(cls, name, size):
+        """
+        Mark a name as in use before the storage reuses or writes its file. The refreshed updated_at
+        keeps collect_project_files off it until the saving project retains it; a collection
+        already deleting the row holds it locked, so this waits until the file is gone too.
+        """
+        if not cls.objects.filter(name=name).update(updated_at=timezone.now()):
+            cls.objects.get_or_create(name=name, defaults={'size': size})
+
+    @classmethod
+    def retain(cls, name):
+        now = timezone.now()
+        if not cls.objects.filter(name=name).update(ref_count=models.F('ref_count') + 1, updated_at=now):
+            storage = project_file_storage()
+            size = storage.size(name) if storage.exists(name) else 0
+            blob, created = cls.objects.get_or_create(name=name, defaults={'size': size, 'ref_count': 1})
+            if not created:
+                cls.objects.filter(pk=blob.pk).update(ref_count=models.F('ref_count') + 1, updated_at=now)
+
+    @classmethod
+    def release(cls, name):
+        cls.objects.filter(name=name, ref_count__gt=0).update(ref_count=models.F('ref_count') - 1, updated_at=timezone.now())
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} references)"
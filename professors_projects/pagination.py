@@ -0,0 +1,9 @@
+from rest_framework.pagination import CursorPagination
+
+
+class ProjectCursorPagination(CursorPagination):
+    # Keyset pagination on the primary key: every page is an indexed range scan, however deep the cursor.
+    ordering = 'id'
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
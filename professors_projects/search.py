@@ -0,0 +1,106 @@
+import re
+from django.db import connection, transaction
+from django.db.models import FloatField, Value
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'professors_projects_project_fts'
+
+# Project fields whose changes have to be reindexed
+INDEXED_FIELDS = {'title', 'description', 'professor', 'professor_id'}
+
+# search_by value -> indexed columns it matches against
+SEARCH_COLUMNS = {
+    'title': ['title'],
+    'description': ['description'],
+    'professor': ['professor_name'],
+    'all': ['title', 'description', 'professor_name'],
+}
+
+# bm25() column weights, in index column order: title, description, professor_name
+RANK_WEIGHTS = (10.0, 1.0, 5.0)
+
+
+def is_supported():
+    return connection.vendor == 'sqlite'
+
+
+def build_match_expression(search_query, search_by='all'):
+    # Quote every word so user input can never be parsed as FTS5 syntax, and prefix-match it
+    # so partially typed words still find results.
+    terms = re.findall(r'\w+', search_query)
+    if not terms:
+        return None
+    columns = ' '.join(SEARCH_COLUMNS[search_by])
+    phrases = ' '.join(f'"{term}"*' for term in terms)
+    return f'{{{columns}}} : ({phrases})'
+
+
+def search_projects(queryset, search_query, search_by='all'):
+    """Filter a Project queryset to full-text matches, annotated with a search_rank (lower is more relevant)."""
+    match = build_match_expression(search_query, search_by)
+    if match is None:
+        # Still annotated, so callers can order by search_rank whatever the query was.
+        return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    # Join the index directly rather than correlating a subquery per row: SQLite then drives the
+    # query from the MATCH and computes bm25() once per matching document.
+    project_table = queryset.model._meta.db_table
+    weights = ', '.join(str(weight) for weight in RANK_WEIGHTS)
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = "{project_table}"."id"', f'{FTS_TABLE} MATCH %s'],
+        params=[match],
+    ).annotate(search_rank=RawSQL(f'bm25({FTS_TABLE}, {weights})', (), output_field=FloatField()))
+
+INDEX_SELECT = (
+    f'INSERT INTO {FTS_TABLE} (rowid, title, description, professor_name) '
+    f"SELECT p.id, p.title, p.description, prof.first_name || ' ' || prof.last_name "
+    f'FROM professors_projects_project p '
+    f'JOIN professors_projects_professor prof ON prof.id = p.professor_id'
+)
+
+
+def index_projects(project_ids):
+    """(Re)index the given projects; ProjectQuerySet calls it after bulk writes, which send no post_save."""
+    if not is_supported():
+        return
+    project_ids = list(project_ids)
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(project_ids), 500):
+            batch = project_ids[start:start + 500]
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', batch)
+            cursor.execute(f'{INDEX_SELECT} WHERE p.id IN ({placeholders})', batch)
+
+
+def index_professor_projects(professor_id):
+    if not is_supported():
+        return
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid IN '
+            f'(SELECT id FROM professors_projects_project WHERE professor_id = %s)',
+            [professor_id],
+        )
+        cursor.execute(f'{INDEX_SELECT} WHERE p.professor_id = %s', [professor_id])
+
+
+def remove_projects(project_ids):
+    if not is_supported():
+        return
+    project_ids = list(project_ids)
+    with connection.cursor() as cursor:
+        for start in range(0, len(project_ids), 500):
+            batch = project_ids[start:start + 500]
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', batch)
+
+
+def rebuild_index():
+    """Repopulate the index from the project and professor tables in bulk; returns the number of rows indexed."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(INDEX_SELECT)
+        indexed = cursor.rowcount
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+    return indexed
@@ -1,7 +1,75 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.db.models import Prefetch
 from .models import Professor, Project, Student, ProjectClaim
 
+# What students contribute to 'claimed_by' and 'students': their suid and full name.
+STUDENT_COLUMNS = ('id', 'suid', 'first_name', 'last_name')
+
+
+def parse_fieldset(params):
+    """
+    Read ?fields=title,is_available,project.title and ?expand=project into keyword arguments for
+    the sparse serializers and their setup_eager_loading. Returns {} when neither is given.
+    """
+    fieldset = {}
+    if params.get('fields'):
+        fields = {}
+        for name in filter(None, (name.strip() for name in params['fields'].split(','))):
+            parent, _, child = name.partition('.')
+            if child:
+                fields[parent] = (fields.get(parent) or set()) | {child}
+            else:
+                fields.setdefault(parent, None)
+        fieldset['fields'] = fields
+    if params.get('expand'):
+        fieldset['expand'] = {name.strip() for name in params['expand'].split(',') if name.strip()}
+    return fieldset
+
+
+def validate_fields(fields, known):
+    unknown = set(fields) - set(known)
+    if unknown:
+        raise serializers.ValidationError({'fields': [f"Unknown fields: {', '.join(sorted(unknown))}"]})
+
+
+class SparseFieldsMixin:
+    """
+    Renders only the requested fields. fields maps field names to None, or for a nested serializer
+    to the set of its own fields to render; nested serializers that are neither given fields nor
+    listed in expand collapse to their primary key.
+    """
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            validate_fields(fields, self.fields)
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+        for name, field in list(self.fields.items()):
+            if not isinstance(field, SparseFieldsMixin):
+                continue
+            nested = fields.get(name) if fields is not None else None
+            if nested is not None or name in (expand or ()):
+                self.fields[name] = type(field)(fields=dict.fromkeys(nested) if nested else None)
+            elif fields is not None:
+                self.fields[name] = serializers.PrimaryKeyRelatedField(read_only=True)
+
+
+def project_loading(fields, prefix=''):
+    """The columns, joins and prefetches ProjectSerializer needs for the given fields."""
+    columns, related, prefetches = {prefix + 'id'}, [], []
+    for name in fields:
+        if name == 'professor_name':
+            related.append(prefix + 'professor')
+            columns.update((prefix + 'professor__first_name', prefix + 'professor__last_name'))
+        elif name == 'claimed_by':
+            prefetches.append(Prefetch(prefix + 'claimed_by', queryset=Student.objects.only(*STUDENT_COLUMNS)))
+        elif name in ProjectSerializer.Meta.fields:
+            columns.add(prefix + name)
+    return columns, related, prefetches
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -14,7 +82,7 @@ class ProfessorSerializer(serializers.ModelSerializer):
         model = Professor
         fields = ['id', 'user', 'first_name', 'last_name', 'suid', 'phone_number']
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     professor_name = serializers.SerializerMethodField()
     claimed_by = serializers.SerializerMethodField()
     file_upload_date = serializers.DateTimeField(format="%Y-%m-%d %H:%M:%S")
@@ -23,6 +91,14 @@ class ProjectSerializer(serializers.ModelSerializer):
         model = Project
         fields = ['id', 'professor_name', 'title', 'description', 'project_id', 'is_available', 'claimed_by', 'claimed_at', 'project_file', 'file_upload_date', 'max_students']
 
+    @staticmethod
+    def setup_eager_loading(queryset, fields=None):
+        # professor_name and claimed_by are read for every row; load them with the list.
+        if fields is None:
+            return queryset.select_related('professor').prefetch_related('claimed_by')
+        columns, related, prefetches = project_loading(fields)
+        return queryset.select_related(*related).prefetch_related(*prefetches).only(*columns)
+
     def get_professor_name(self, obj):
         return f"{obj.professor.first_name} {obj.professor.last_name}"
 
@@ -43,7 +119,7 @@ class StudentSerializer(serializers.ModelSerializer):
         model = Student
         fields = ['id', 'user', 'first_name', 'last_name', 'suid', 'phone_number', 'year_attended']
 
-class ProjectClaimSerializer(serializers.ModelSerializer):
+class ProjectClaimSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     students = serializers.SerializerMethodField()
     project = ProjectSerializer()  # Nest the ProjectSerializer
 
@@ -59,4 +135,31 @@ class ProjectClaimSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = ProjectClaim
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+    @staticmethod
+    def setup_eager_loading(queryset, fields=None, expand=None):
+        if fields is None:
+            return queryset.select_related('project__professor').prefetch_related('students', 'project__claimed_by')
+
+        columns, related, prefetches = {'id'}, [], []
+        for name in fields:
+            if name == 'students':
+                prefetches.append(Prefetch('students', queryset=Student.objects.only(*STUDENT_COLUMNS)))
+            elif name == 'project' and (fields['project'] or 'project' in (expand or ())):
+                project_fields = fields['project'] or ProjectSerializer.Meta.fields
+                project_columns, project_related, project_prefetches = project_loading(project_fields, 'project__')
+                columns.update(project_columns)
+                related += ['project', *project_related]
+                prefetches += project_prefetches
+            elif name in ('project', 'is_approved', 'created_at', 'approved_at'):
+                columns.add(name)
+        return queryset.select_related(*related).prefetch_related(*prefetches).only(*columns)
+
+class ProjectClaimSummarySerializer(ProjectClaimSerializer):
+    # Used where the parent project is already in the response, so only its pk is repeated.
+    project = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        return queryset.prefetch_related('students')
\ No newline at end of file
@@ -0,0 +1,133 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save, m2m_changed
+from django.dispatch import receiver
+from django.contrib.auth.models import User
+from django.utils import timezone
+from .models import Professor, Student, Project, ProjectClaim, ProjectClaimRelation, FreedProjectId, Blob, bump_catalog_version
+from . import search
+from .authentication import user_cache
+from .serializers import UserSerializer
+
+@receiver(post_delete, sender=Project)
+def release_project_id(sender, instance, **kwargs):
+    FreedProjectId.objects.bulk_create([FreedProjectId(project_id=instance.project_id)], ignore_conflicts=True)
+
+@receiver(post_save, sender=Project)
+def track_project_file(sender, instance, update_fields, **kwargs):
+    if update_fields is not None and 'project_file' not in update_fields:
+        return
+    previous = getattr(instance, '_loaded_project_file', None) or ''
+    current = instance.project_file.name or ''
+    if previous == current:
+        return
+    if current:
+        Blob.retain(current)
+    if previous:
+        Blob.release(previous)
+    instance._loaded_project_file = current
+
+@receiver(post_delete, sender=Project)
+def release_project_file(sender, instance, **kwargs):
+    if instance.project_file:
+        Blob.release(instance.project_file.name)
+
+@receiver(post_save, sender=Project)
+def index_project(sender, instance, update_fields, **kwargs):
+    if update_fields is None or search.INDEXED_FIELDS & set(update_fields):
+        search.index_projects([instance.pk])
+
+@receiver(post_delete, sender=Project)
+def unindex_project(sender, instance, **kwargs):
+    search.remove_projects([instance.pk])
+
+@receiver(post_save, sender=Professor)
+def reindex_professor_projects(sender, instance, created, **kwargs):
+    if not created:
+        search.index_professor_projects(instance.pk)
+        # Dashboards show the professor's name on each project.
+        Project.objects.filter(professor=instance).update(updated_at=timezone.now())
+
+@receiver(post_save, sender=ProjectClaimRelation)
+def count_added_relation(sender, instance, created, **kwargs):
+    if created:
+        Project.objects.filter(pk=instance.project_id).update(claimed_count=F('claimed_count') + 1)
+
+@receiver(post_delete, sender=ProjectClaimRelation)
+def count_removed_relation(sender, instance, **kwargs):
+    Project.objects.filter(pk=instance.project_id).update(claimed_count=F('claimed_count') - 1)
+
+@receiver(m2m_changed, sender=Project.claimed_by.through)
+def count_related_students(sender, instance, action, reverse, pk_set, **kwargs):
+    # claimed_by.add() bulk-inserts relation rows without post_save; remove() and clear() delete them
+    # through the queryset, which does send post_delete, so only additions are counted here.
+    if action != 'post_add' or not pk_set:
+        return
+    if reverse:
+        Project.objects.filter(pk__in=pk_set).update(claimed_count=F('claimed_count') + 1)
+    else:
+        Project.objects.filter(pk=instance.pk).update(claimed_count=F('claimed_count') + len(pk_set))
+
+@receiver(pre_save, sender=ProjectClaim)
+def remember_claim_state(sender, instance, **kwargs):
+    # A save can approve a claim or move it (e.g. from the admin); keep the stored state to count the change.
+    instance._stored_state = None
+    if not instance._state.adding:
+        instance._stored_state = ProjectClaim.objects.filter(pk=instance.pk).values_list('project_id', 'is_approved').first()
+
+@receiver(post_save, sender=ProjectClaim)
+def count_new_claim(sender, instance, created, **kwargs):
+    if created:
+        if not instance.is_approved:
+            Project.objects.filter(pk=instance.project_id).update(pending_claims_count=F('pending_claims_count') + 1)
+        return
+    stored = getattr(instance, '_stored_state', None)
+    if stored is None or stored == (instance.project_id, instance.is_approved):
+        return
+    project_id, was_approved = stored
+    if not was_approved:
+        Project.objects.filter(pk=project_id).update(pending_claims_count=F('pending_claims_count') - 1)
+    if not instance.is_approved:
+        Project.objects.filter(pk=instance.project_id).update(pending_claims_count=F('pending_claims_count') + 1)
+
+@receiver(post_delete, sender=ProjectClaim)
+def count_removed_claim(sender, instance, **kwargs):
+    if not instance.is_approved:
+        Project.objects.filter(pk=instance.project_id).update(pending_claims_count=F('pending_claims_count') - 1)
+
+@receiver(post_save, sender=Professor)
+@receiver(post_delete, sender=Professor)
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(post_save, sender=ProjectClaim)
+@receiver(post_delete, sender=ProjectClaim)
+@receiver(post_save, sender=ProjectClaimRelation)
+@receiver(post_delete, sender=ProjectClaimRelation)
+def invalidate_catalog(sender, **kwargs):
+    bump_catalog_version()
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_catalog_users(sender, update_fields=None, **kwargs):
+    # Cached listings embed UserSerializer fields; logins only touch last_login and keep the cache warm.
+    if update_fields is None or set(update_fields) & set(UserSerializer.Meta.fields):
+        bump_catalog_version()
+
+@receiver(m2m_changed, sender=Project.claimed_by.through)
+@receiver(m2m_changed, sender=ProjectClaim.students.through)
+def invalidate_catalog_relations(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_catalog_version()
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
+
+@receiver(post_save, sender=Professor)
+@receiver(post_delete, sender=Professor)
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def forget_cached_profile(sender, instance, **kwargs):
+    user_cache.invalidate(instance.user_id)
@@ -0,0 +1,52 @@
+import hashlib
+import os
+import re
+from django.core.files.storage import FileSystemStorage, storages
+
+COMPOUND_EXTENSIONS = ('.tar.gz', '.tar.bz2', '.tar.xz')
+EXTENSION_RE = re.compile(r'^\.[a-z0-9]{1,10}$')
+
+
+def file_extension(filename):
+    filename = filename.lower()
+    for extension in COMPOUND_EXTENSIONS:
+        if filename.endswith(extension):
+            return extension
+    extension = os.path.splitext(filename)[1]
+    return extension if EXTENSION_RE.match(extension) else ''
+
+
+def content_hash(content):
+    hasher = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks():
+        hasher.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return hasher.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores each distinct file once, named after its SHA-256 (project_files/ab/<hash>.zip), so an
+    identical re-upload reuses the existing file. Which names are still in use is tracked by Blob.
+    """
+
+    def save(self, name, content, max_length=None):
+        # Callers that already hashed the bytes, like chunked uploads, pass the digest along.
+        digest = getattr(content, 'sha256', None) or content_hash(content)
+        directory, filename = os.path.split(name)
+        name = os.path.join(directory, digest[:2], digest + file_extension(filename))
+        # Imported here because the models module builds its file fields from this storage.
+        from .models import Blob
+        # Pinned first, so the file cannot be collected between the existence check and the save
+        # that retains it.
+        Blob.pin(name, content.size)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length)
+
+
+def project_file_storage():
+    return storages['project_files']
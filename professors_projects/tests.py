@@ -1,3 +1,1498 @@
-from django.test import TestCase
+import asyncio
+import csv
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+import random
+import re
+import tempfile
+import time
+import uuid
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Count, F
+from django.http import JsonResponse
+from django.test import LiveServerTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from . import fast_serializers, instrumentation, loadtest, uploads
+from .authentication import ClaimsJWTAuthentication, user_cache
+from .cache import DjangoCacheBackend, ResponseCache
+from .events import EventBroker, format_event, project_events
+from .instrumentation import RequestTimingMiddleware, slow_requests
+from .models import Blob, Professor, Project, Student, ProjectClaim, ProjectClaimRelation, Sequence, FreedProjectId, ProjectAlreadyClaimed, ProjectIdsExhausted, UploadSession, get_catalog_version
+from .serializers import ProjectClaimSerializer, ProjectSerializer
 
-# Create your tests here.
+
+def seed_catalog(num_projects, students_per_project=2, prefix='seed'):
+    """Create professors, projects and claims so every serialized row has related data to load."""
+    professors = []
+    for i in range(3):
+        user = User.objects.create(username=f'{prefix}-prof-{i}')
+        professors.append(Professor.objects.create(
+            user=user, first_name='Prof', last_name=f'{prefix}{i}', suid=f'{prefix[:3]}p{i:05d}'
+        ))
+
+    projects = []
+    for i in range(num_projects):
+        is_taken = i % 2 == 0
+        project = Project.objects.create(
+            professor=professors[i % len(professors)],
+            title=f'{prefix} project {i}',
+            description=f'Description for {prefix} project {i}',
+            max_students=students_per_project,
+            is_available=not is_taken,
+            project_file=f'project_files/{prefix}-{i}.zip' if is_taken else None,
+        )
+        projects.append(project)
+
+        students = []
+        for j in range(students_per_project):
+            user = User.objects.create(username=f'{prefix}-student-{i}-{j}')
+            students.append(Student.objects.create(
+                user=user, first_name='Student', last_name=f'{i}-{j}', suid=f'{prefix[:3]}{i:04d}{j:03d}'
+            ))
+        claim = ProjectClaim.objects.create(project=project, is_approved=is_taken)
+        claim.students.add(*students)
+        if is_taken:
+            for student in students:
+                ProjectClaimRelation.objects.create(project=project, student=student)
+    return projects
+
+
+class ListQueryCountTests(TestCase):
+    """Every project listing must run a fixed number of queries, however many projects exist."""
+
+    endpoints = [
+        ('api-projects-list', {}),
+        ('api-available-projects', {}),
+        ('api-completed-projects', {}),
+        ('api-project-search', {}),
+        ('api-project-search', {'availability': 'taken'}),
+        ('api-project-search', {'search_query': 'project', 'search_by': 'title'}),
+        ('api-project-search', {'search_query': 'Prof', 'search_by': 'professor'}),
+    ]
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def count_queries(self, url_name, params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse(url_name), params)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_projects(self):
+        seed_catalog(4, prefix='small')
+        small = {(name, tuple(params.items())): self.count_queries(name, params) for name, params in self.endpoints}
+
+        seed_catalog(40, prefix='large')
+        for name, params in self.endpoints:
+            with self.subTest(endpoint=name, params=params):
+                self.assertEqual(self.count_queries(name, params), small[(name, tuple(params.items()))])
+
+    def test_project_list_query_budget(self):
+        seed_catalog(20)
+        # The catalog version, the projects joined to their professor and the claimed_by prefetch.
+        with self.assertNumQueries(3):
+            self.client.get(reverse('api-projects-list'))
+
+
+class ProjectPaginationTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        seed_catalog(25)
+
+    def test_cursor_pages_cover_every_project_once(self):
+        expected = {
+            'api-projects-list': Project.objects.all(),
+            'api-available-projects': Project.objects.filter(is_available=True),
+            'api-completed-projects': Project.objects.filter(is_available=False).exclude(project_file=''),
+            'api-project-search': Project.objects.all(),
+        }
+        for url_name, queryset in expected.items():
+            with self.subTest(endpoint=url_name):
+                seen = []
+                url = reverse(url_name) + '?page_size=4'
+                while url:
+                    response = self.client.get(url)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertLessEqual(len(response.data['results']), 4)
+                    seen.extend(project['id'] for project in response.data['results'])
+                    url = response.data['next']
+                self.assertEqual(seen, sorted(queryset.values_list('id', flat=True)))
+
+class ProjectSearchTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.professor = Professor.objects.create(
+            user=User.objects.create(username='search-prof'), first_name='Grace', last_name='Hopper', suid='srchp00001'
+        )
+        self.compilers = Project.objects.create(
+            professor=self.professor, title='Compilers for robots', description='Code generation'
+        )
+        self.vision = Project.objects.create(
+            professor=self.professor, title='Vision systems', description='Cameras on compilers-free robots'
+        )
+        self.unrelated = Project.objects.create(professor=self.professor, title='Databases', description='Indexes')
+
+    def search(self, **params):
+        response = self.client.get(reverse('api-project-search'), params)
+        self.assertEqual(response.status_code, 200)
+        return [project['id'] for project in response.data['results']]
+
+    def test_matches_are_ranked_by_relevance(self):
+        self.assertEqual(self.search(search_query='compil', search_by='all'), [self.compilers.id, self.vision.id])
+        self.assertEqual(self.search(search_query='robots'), [self.compilers.id, self.vision.id])
+        self.assertEqual(self.search(search_query='cameras', search_by='description'), [self.vision.id])
+        self.assertEqual(self.search(search_query='cameras', search_by='title'), [])
+
+    def test_index_follows_project_and_professor_writes(self):
+        self.assertCountEqual(
+            self.search(search_query='hopper', search_by='professor'), [self.compilers.id, self.vision.id, self.unrelated.id]
+        )
+
+        self.professor.last_name = 'Liskov'
+        self.professor.save()
+        self.assertEqual(self.search(search_query='hopper', search_by='professor'), [])
+        self.assertEqual(len(self.search(search_query='liskov', search_by='professor')), 3)
+
+        self.unrelated.title = 'Distributed databases'
+        self.unrelated.save()
+        self.assertEqual(self.search(search_query='distributed', search_by='title'), [self.unrelated.id])
+        self.unrelated.delete()
+        self.assertEqual(self.search(search_query='distributed', search_by='title'), [])
+
+    def test_punctuation_only_queries_find_nothing(self):
+        for search_query in ['"', '-', '...']:
+            with self.subTest(search_query=search_query):
+                self.assertEqual(self.search(search_query=search_query), [])
+
+    def test_index_follows_bulk_writes(self):
+        created = Project.objects.bulk_create([
+            Project(professor=self.professor, project_id=project_id, title='Quantum annealing', description='')
+            for project_id in Project.allocate_project_ids(2)
+        ])
+        self.assertCountEqual(self.search(search_query='quantum'), [project.pk for project in created])
+
+        Project.objects.filter(pk=created[0].pk).update(title='Photonic chips')
+        self.assertEqual(self.search(search_query='quantum'), [created[1].pk])
+        self.assertEqual(self.search(search_query='photonic', search_by='title'), [created[0].pk])
+
+        created[1].description = 'Superconducting qubits'
+        Project.objects.bulk_update([created[1]], ['description'])
+        self.assertEqual(self.search(search_query='qubits', search_by='description'), [created[1].pk])
+
+        with self.assertNumQueries(1):
+            Project.objects.filter(pk=created[0].pk).update(max_students=3)
+
+    def test_ranked_results_paginate_without_gaps(self):
+        seed_catalog(12)
+        expected = self.search(search_query='project', page_size=100)
+        self.assertEqual(len(expected), 12)
+
+        seen = []
+        url = reverse('api-project-search') + '?search_query=project&page_size=5'
+        while url:
+            response = self.client.get(url)
+            seen.extend(project['id'] for project in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, expected)
+
+class CatalogCacheTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.projects = seed_catalog(3)
+
+    def test_repeat_requests_are_served_from_cache_until_a_write(self):
+        url = reverse('api-projects-list')
+        first = self.client.get(url).data
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).data, first)
+
+        self.projects[1].title = 'Renamed'
+        self.projects[1].save()
+        titles = [project['title'] for project in self.client.get(url).data['results']]
+        self.assertIn('Renamed', titles)
+
+    def test_claim_changes_invalidate_available_projects(self):
+        url = reverse('api-available-projects')
+        self.client.get(url)
+        project = self.projects[1]
+        student = Student.objects.create(user=User.objects.create(username='cache-student'), suid='cache00001')
+        claim = ProjectClaim.objects.create(project=project)
+        claim.students.add(student)
+        claim.approve()
+
+        ids = [entry['id'] for entry in self.client.get(url).data['results']]
+        self.assertNotIn(project.id, ids)
+
+    def test_user_changes_invalidate_the_professor_listing(self):
+        url = reverse('api-professors-list')
+        first = self.client.get(url)
+        user = self.projects[0].professor.user
+        user.email = 'moved@example.com'
+        user.save()
+
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertIn('moved@example.com', [professor['user']['email'] for professor in second.data])
+
+        version = get_catalog_version()
+        user.save(update_fields=['last_login'])
+        self.assertEqual(get_catalog_version(), version)
+
+    @override_settings(CACHES={
+        **settings.CACHES, 'catalog': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'catalog_cache'},
+    })
+    async def test_async_lookups_use_the_async_cache_api(self):
+        await sync_to_async(call_command)('createcachetable', 'catalog_cache', database='default', stdout=StringIO())
+        response_cache = ResponseCache(DjangoCacheBackend('catalog'))
+        request = APIRequestFactory().get('/api/projects/')
+        builds = []
+
+        def build():
+            builds.append(1)
+            return {'results': []}
+
+        for _ in range(2):
+            self.assertEqual(await response_cache.aget_or_build('projects', request, build), {'results': []})
+        self.assertEqual(len(builds), 1)
+        self.assertEqual((response_cache.hits, response_cache.misses), (1, 1))
+
+    def test_stats_are_admin_only(self):
+        self.assertEqual(self.client.get(reverse('api-cache-stats')).status_code, 401)
+        self.client.force_authenticate(User.objects.create(username='cache-admin', is_staff=True))
+        stats = self.client.get(reverse('api-cache-stats')).data
+        self.assertEqual(set(stats), {'backend', 'hits', 'misses', 'hit_rate', 'entries'})
+
+class DashboardQueryCountTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def count_queries(self, user, url_name):
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.data
+
+    def test_professor_dashboard_query_count_is_constant(self):
+        projects = seed_catalog(3, prefix='small')
+        professor = projects[0].professor
+        small, _ = self.count_queries(professor.user, 'api-professor-dashboard')
+
+        for project in seed_catalog(30, prefix='large'):
+            Project.objects.filter(pk=project.pk).update(professor=professor)
+        large, data = self.count_queries(professor.user, 'api-professor-dashboard')
+
+        self.assertEqual(large, small)
+        self.assertEqual(len(data), Project.objects.filter(professor=professor).count())
+        for entry in data:
+            for claim in entry['claims']:
+                self.assertEqual(claim['project'], entry['project']['id'])
+
+    def test_student_dashboard_query_count_is_constant(self):
+        student = Student.objects.create(user=User.objects.create(username='dash-student'), suid='dash000001')
+        projects = seed_catalog(3, prefix='small')
+        for project in projects:
+            ProjectClaim.objects.create(project=project).students.add(student)
+        small, _ = self.count_queries(student.user, 'api-student-dashboard')
+
+        for project in seed_catalog(30, prefix='large'):
+            ProjectClaim.objects.create(project=project).students.add(student)
+        large, data = self.count_queries(student.user, 'api-student-dashboard')
+
+        self.assertEqual(large, small)
+        self.assertEqual(len(data), 33)
+
+
+class TokenClaimsTests(TestCase):
+
+    def setUp(self):
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+        self.client = APIClient()
+        user = User.objects.create_user(username='claims-student', password='secret-pass')
+        self.student = Student.objects.create(user=user, suid='claim00001')
+
+    def login(self):
+        response = self.client.post(reverse('api-user-login'), {'username': 'claims-student', 'password': 'secret-pass'})
+        self.assertEqual(response.status_code, 200)
+        return response.data['token']
+
+    def authenticate(self, token):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return ClaimsJWTAuthentication().authenticate(request)[0]
+
+    def test_role_claims_resolve_the_profile_without_queries(self):
+        token = self.login()
+        claims = AccessToken(token)
+        self.assertEqual((claims['role'], claims['profile_id']), ('student', self.student.pk))
+
+        with self.assertNumQueries(1):
+            user = self.authenticate(token)
+            self.assertEqual(user.student.pk, self.student.pk)
+            self.assertFalse(hasattr(user, 'professor'))
+        with self.assertNumQueries(0):
+            user = self.authenticate(token)
+            self.assertEqual(user.student.suid, 'claim00001')
+            self.assertFalse(hasattr(user, 'professor'))
+
+        response = self.client.get(reverse('api-student-dashboard'), HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 200)
+
+    def test_saves_invalidate_the_cached_user(self):
+        token = self.login()
+        self.authenticate(token)
+        self.student.user.is_active = False
+        self.student.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+        self.student.user.is_active = True
+        self.student.user.save()
+        self.student.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+
+class ConditionalResponseTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.projects = seed_catalog(3)
+
+    def test_unchanged_listing_is_not_modified(self):
+        url = reverse('api-projects-list')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.projects[0].title = 'Renamed'
+        self.projects[0].save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_student_dashboard_etag_is_per_user(self):
+        student = Student.objects.create(user=User.objects.create(username='etag-student'), suid='etag000001')
+        ProjectClaim.objects.create(project=self.projects[0]).students.add(student)
+        self.client.force_authenticate(student.user)
+        url = reverse('api-student-dashboard')
+        first = self.client.get(url)
+        self.assertIn('Authorization', first['Vary'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        self.client.force_authenticate(self.projects[0].professor.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 403)
+
+    def test_dashboards_ignore_other_users_claims(self):
+        student = Student.objects.create(user=User.objects.create(username='etag-student'), suid='etag000001')
+        other = Student.objects.create(user=User.objects.create(username='etag-other'), suid='etag000002')
+        claim = ProjectClaim.objects.create(project=self.projects[1])
+        claim.students.add(student)
+        professor = self.projects[1].professor
+        views = [(student.user, reverse('api-student-dashboard')), (professor.user, reverse('api-professor-dashboard'))]
+        etags = {}
+        for user, url in views:
+            self.client.force_authenticate(user)
+            etags[url] = self.client.get(url)['ETag']
+
+        # A claim on another professor's project changes neither dashboard.
+        elsewhere = next(project for project in self.projects if project.professor != professor)
+        ProjectClaim.objects.create(project=elsewhere).students.add(other)
+        for user, url in views:
+            self.client.force_authenticate(user)
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etags[url]).status_code, 304)
+
+        for change in [
+            lambda: claim.approve(),
+            lambda: Project.objects.filter(pk=self.projects[1].pk).update(title='Renamed'),
+            lambda: Professor.objects.get(pk=professor.pk).save(),
+        ]:
+            change()
+            for user, url in views:
+                with self.subTest(url=url):
+                    self.client.force_authenticate(user)
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+                    self.assertEqual(response.status_code, 200)
+                    etags[url] = response['ETag']
+
+
+class ProjectEventTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.professor = Professor.objects.create(user=User.objects.create(username='event-prof'), suid='eventp0001')
+        self.project = Project.objects.create(professor=self.professor, title='Streamed', description='', max_students=2)
+        self.student = Student.objects.create(user=User.objects.create(username='event-student'), suid='event00001')
+
+    def test_broker_replays_buffered_events(self):
+        broker = EventBroker(buffer_size=2)
+        first, second, third = (broker.publish('project', {'n': n}) for n in range(3))
+        self.assertEqual(broker.events_after(second[0]), [third])
+        self.assertEqual(broker.events_after(first[0]), [second, third])
+        self.assertIsNone(broker.events_after(first[0] - 1))
+        self.assertEqual(broker.events_after(third[0]), [])
+
+    def test_claim_and_approval_publish_project_deltas(self):
+        self.client.force_authenticate(self.student.user)
+        start = project_events.publish('test', {})[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('api-claim-project', args=[self.project.project_id]),
+                {'student_ids': [self.student.suid]}, format='json',
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            ProjectClaim.objects.get(project=self.project).approve()
+
+        deltas = [data for _, _, data in project_events.events_after(start)]
+        self.assertEqual(
+            [(d['project_id'], d['is_available'], d['claimed_count'], d['pending_claims_count']) for d in deltas],
+            [(self.project.project_id, True, 0, 1), (self.project.project_id, False, 1, 0)],
+        )
+
+    def test_wsgi_route_answers_instead_of_streaming(self):
+        # Run in a thread so that a regression fails after the timeout instead of hanging the suite.
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown, wait=False)
+        response = executor.submit(self.client.get, reverse('api-project-events')).result(timeout=5)
+        self.assertEqual(response.status_code, 501)
+
+    @override_settings(ROOT_URLCONF='project_claiming_website.asgi_urls')
+    async def test_stream_resumes_from_last_event_id(self):
+        seen = project_events.publish('project', {'project_id': '1000'})
+        missed = project_events.publish('project', {'project_id': '1001'})
+        response = await self.async_client.get(reverse('api-project-events'), headers={'Last-Event-ID': str(seen[0])})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b'retry: 3000\n\n')
+        self.assertEqual(await anext(chunks), format_event(missed).encode())
+
+        live = project_events.publish('project', {'project_id': '1002'})
+        self.assertEqual(await anext(chunks), format_event(live).encode())
+        # A client disconnect cancels the response task while it waits for the next event.
+        waiting = asyncio.ensure_future(anext(chunks))
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await waiting
+        self.assertEqual(len(project_events), 0)
+
+
+class AsyncReadPathTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.projects = seed_catalog(3)
+        self.student = Student.objects.create(user=User.objects.create(username='async-student'), suid='async00001')
+        ProjectClaim.objects.create(project=self.projects[0]).students.add(self.student)
+        self.token = str(RefreshToken.for_user(self.student.user).access_token)
+
+    def sync_get(self, url, **headers):
+        response = self.client.get(url, **headers)
+        return response.status_code, json.loads(response.content)
+
+    @override_settings(ROOT_URLCONF='project_claiming_website.asgi_urls')
+    async def test_async_views_match_sync_views(self):
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {self.token}'}
+        for name, query, headers in [
+            ('api-projects-list', '?page_size=2', {}),
+            ('api-projects-list', '?fields=title,claimed_by', {}),
+            ('api-available-projects', '?fields=nonsense', {}),
+            ('api-student-dashboard', '?fields=id,project.title', auth),
+            ('api-available-projects', '', {}),
+            ('api-completed-projects', '', {}),
+            ('api-project-search', '?search_query=seed', {}),
+            ('api-student-dashboard', '', auth),
+            ('api-professor-dashboard', '', auth),
+        ]:
+            with self.subTest(name):
+                url = reverse(name) + query
+                async_response = await self.async_client.get(url, headers={'Authorization': headers.get('HTTP_AUTHORIZATION', '')})
+                with override_settings(ROOT_URLCONF='project_claiming_website.urls'):
+                    expected = await sync_to_async(self.sync_get)(url, **headers)
+                self.assertEqual((async_response.status_code, json.loads(async_response.content)), expected)
+
+    @override_settings(ROOT_URLCONF='project_claiming_website.asgi_urls')
+    async def test_async_dashboard_is_conditional(self):
+        url = reverse('api-student-dashboard')
+        headers = {'Authorization': f'Bearer {self.token}'}
+        first = await self.async_client.get(url, headers=headers)
+        self.assertIn('Authorization', first['Vary'])
+        second = await self.async_client.get(url, headers={**headers, 'If-None-Match': first['ETag']})
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual((await self.async_client.get(url)).status_code, 401)
+
+    @override_settings(ROOT_URLCONF='project_claiming_website.asgi_urls')
+    async def test_bad_tokens_are_refused_like_the_sync_views(self):
+        for name in ['api-projects-list', 'api-available-projects', 'api-project-search', 'api-student-dashboard']:
+            for header in ['Bearer garbage', 'Bearer', f'Bearer {self.token}x']:
+                with self.subTest(name=name, header=header):
+                    url = reverse(name)
+                    async_response = await self.async_client.get(url, headers={'Authorization': header})
+                    with override_settings(ROOT_URLCONF='project_claiming_website.urls'):
+                        sync_response = await sync_to_async(self.client.get)(url, HTTP_AUTHORIZATION=header)
+                    self.assertEqual(async_response.status_code, 401)
+                    self.assertEqual(json.loads(async_response.content), json.loads(sync_response.content))
+                    self.assertEqual(async_response['WWW-Authenticate'], sync_response['WWW-Authenticate'])
+
+
+class ProjectFileDownloadTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.body = bytes(range(256)) * 40
+        professor = Professor.objects.create(user=User.objects.create(username='file-prof'), suid='filep00001')
+        self.project = Project.objects.create(professor=professor, title='Files', description='', max_students=2)
+        self.project.project_file.save('report.tar.gz', ContentFile(self.body), save=False)
+        self.project.project_file_name = 'report.tar.gz'
+        self.project.file_upload_date = timezone.now()
+        self.project.save()
+        self.url = reverse('api-download-file', args=[self.project.project_id])
+
+    def test_full_download_sends_validators(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.body)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertEqual(response['Content-Length'], str(len(self.body)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="report.tar.gz"')
+
+        not_modified = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_byte_ranges(self):
+        size = len(self.body)
+        for header, start, end in [('bytes=100-199', 100, 199), ('bytes=10000-', 10000, size - 1), ('bytes=-50', size - 50, size - 1)]:
+            with self.subTest(header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/{size}')
+                self.assertEqual(b''.join(response.streaming_content), self.body[start:end + 1])
+
+        self.assertEqual(self.client.get(self.url, HTTP_RANGE=f'bytes={size}-').status_code, 416)
+        stale = self.client.get(self.url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(stale.status_code, 200)
+
+    def test_sendfile_mode_sends_only_headers(self):
+        with override_settings(PROJECT_FILE_SENDFILE='x-accel-redirect'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected/{self.project.project_file.name}')
+        self.assertEqual(response.content, b'')
+
+
+class ChunkedUploadTests(TestCase):
+
+    def setUp(self):
+        for setting in ('MEDIA_ROOT', 'PROJECT_FILE_UPLOAD_DIR'):
+            directory = tempfile.TemporaryDirectory()
+            self.addCleanup(directory.cleanup)
+            self.enterContext(override_settings(**{setting: directory.name}))
+        self.client = APIClient()
+        professor = Professor.objects.create(user=User.objects.create(username='upload-prof'), suid='uploadp001')
+        self.project = Project.objects.create(professor=professor, title='Uploads', description='', max_students=2)
+        self.student = Student.objects.create(user=User.objects.create(username='upload-student'), suid='upload0001')
+        claim = ProjectClaim.objects.create(project=self.project)
+        claim.students.add(self.student)
+        claim.approve()
+        self.client.force_authenticate(self.student.user)
+        self.body = bytes(range(256)) * 1000
+
+    def start(self, size):
+        return self.client.post(
+            reverse('api-create-upload-session', args=[self.project.project_id]),
+            {'filename': 'report.zip', 'size': size}, format='json',
+        )
+
+    def put(self, upload_id, start, end):
+        return self.client.put(
+            reverse('api-upload-session', args=[upload_id]), self.body[start:end + 1],
+            content_type='application/octet-stream', HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{len(self.body)}',
+        )
+
+    def test_chunks_resume_and_finalize(self):
+        upload_id = self.start(len(self.body)).data['upload_id']
+        self.assertEqual(self.put(upload_id, 0, 99999).data['offset'], 100000)
+        self.assertEqual(self.put(upload_id, 0, 99999).status_code, 409)
+        self.assertEqual(self.client.get(reverse('api-upload-session', args=[upload_id]))['Upload-Offset'], '100000')
+
+        # A different worker has no running hash for the session and rebuilds it from the part file.
+        uploads._hashers.clear()
+        self.assertEqual(self.put(upload_id, 100000, len(self.body) - 1).data['offset'], len(self.body))
+
+        # The final chunk stored the digest, so completing does not read the part file again.
+        digest = hashlib.sha256(self.body).hexdigest()
+        self.assertEqual(UploadSession.objects.get(pk=upload_id).sha256, digest)
+        uploads._hashers.clear()
+        with mock.patch.object(uploads, 'file_hash', side_effect=AssertionError('rehashed')):
+            response = self.client.post(reverse('api-complete-upload', args=[upload_id]), {'sha256': digest}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['sha256'], digest)
+        self.project.refresh_from_db()
+        with self.project.project_file.open('rb') as stored:
+            self.assertEqual(stored.read(), self.body)
+        self.assertEqual(os.listdir(settings.PROJECT_FILE_UPLOAD_DIR), [])
+
+    def test_size_limits_are_checked_before_the_body(self):
+        with override_settings(PROJECT_FILE_MAX_UPLOAD_SIZE=1000):
+            self.assertEqual(self.start(1001).status_code, 413)
+        upload_id = self.start(1000).data['upload_id']
+        response = self.client.put(
+            reverse('api-upload-session', args=[upload_id]), b'x' * 2000,
+            content_type='application/octet-stream', HTTP_CONTENT_RANGE='bytes 0-1999/2000',
+        )
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(self.client.post(reverse('api-complete-upload', args=[upload_id])).status_code, 409)
+
+    def test_completion_checks_the_digest_and_the_claim(self):
+        upload_id = self.start(1000).data['upload_id']
+        self.client.put(
+            reverse('api-upload-session', args=[upload_id]), self.body[:1000],
+            content_type='application/octet-stream', HTTP_CONTENT_RANGE='bytes 0-999/1000',
+        )
+        url = reverse('api-complete-upload', args=[upload_id])
+        for sha256 in [12, ['a' * 64], 'z' * 64, 'ab']:
+            with self.subTest(sha256=sha256):
+                response = self.client.post(url, {'sha256': sha256}, format='json')
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.data['message'], 'sha256 must be a 64-character hex digest')
+
+        ProjectClaim.objects.filter(project=self.project).update(is_approved=False)
+        response = self.client.post(url, {'sha256': hashlib.sha256(self.body[:1000]).hexdigest()}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['message'], 'Your claim for this project has not been approved')
+        self.project.refresh_from_db()
+        self.assertFalse(self.project.project_file)
+
+    def test_abandoned_uploads_expire(self):
+        abandoned, active = (self.start(len(self.body)).data['upload_id'] for _ in range(2))
+        self.put(abandoned, 0, 999)
+        self.put(active, 0, 499)
+        UploadSession.objects.filter(pk=abandoned).update(updated_at=timezone.now() - timedelta(days=2))
+        directory = settings.PROJECT_FILE_UPLOAD_DIR
+        for name, age in [('orphaned.part', 2 * 24 * 60 * 60), ('recent.part', 0)]:
+            with open(os.path.join(directory, name), 'wb') as partial:
+                partial.write(b'x' * 10)
+            os.utime(os.path.join(directory, name), (time.time() - age, time.time() - age))
+
+        out = StringIO()
+        call_command('collect_project_files', dry_run=True, stdout=out)
+        self.assertIn('1 abandoned uploads, 2 partial files: 1010 bytes', out.getvalue())
+        self.assertEqual(len(os.listdir(directory)), 4)
+
+        call_command('collect_project_files', stdout=StringIO())
+        self.assertEqual(sorted(os.listdir(directory)), sorted([f'{active}.part', 'recent.part']))
+        self.assertEqual(list(UploadSession.objects.values_list('pk', flat=True)), [uuid.UUID(active)])
+        self.assertEqual(self.put(abandoned, 1000, 1999).status_code, 404)
+        self.assertEqual(self.put(active, 500, 999).data['offset'], 1000)
+
+
+class ContentAddressedStorageTests(TestCase):
+
+    def setUp(self):
+        for setting in ('MEDIA_ROOT', 'PROJECT_FILE_UPLOAD_DIR'):
+            directory = tempfile.TemporaryDirectory()
+            self.addCleanup(directory.cleanup)
+            self.enterContext(override_settings(**{setting: directory.name}))
+        professor = Professor.objects.create(user=User.objects.create(username='blob-prof'), suid='blobp00001')
+        self.first, self.second = (
+            Project.objects.create(professor=professor, title=f'Blob {i}', description='', max_students=2) for i in range(2)
+        )
+
+    def test_identical_uploads_share_one_blob_until_collected(self):
+        self.first.project_file.save('report.zip', ContentFile(b'final report'))
+        self.second.project_file.save('copy.zip', ContentFile(b'final report'))
+        self.assertEqual(self.first.project_file.name, self.second.project_file.name)
+        shared = Blob.objects.get(name=self.first.project_file.name)
+        self.assertEqual(shared.ref_count, 2)
+
+        self.first.project_file.save('report.zip', ContentFile(b'revised report'))
+        Project.objects.get(pk=self.second.pk).delete()
+        shared.refresh_from_db()
+        self.assertEqual(shared.ref_count, 0)
+
+        out = StringIO()
+        call_command('collect_project_files', min_age=0, stdout=out)
+        self.assertIn('Removed 1 unreferenced files, 12 bytes', out.getvalue())
+        self.assertFalse(Blob.objects.filter(pk=shared.pk).exists())
+        self.assertFalse(self.first.project_file.storage.exists(shared.name))
+        self.assertTrue(self.first.project_file.storage.exists(self.first.project_file.name))
+
+    def test_saving_identical_bytes_keeps_an_unreferenced_blob(self):
+        self.first.project_file.save('report.zip', ContentFile(b'final report'))
+        name = self.first.project_file.name
+        self.first.project_file = ''
+        self.first.save()
+        self.assertEqual(Blob.objects.get(name=name).ref_count, 0)
+        Blob.objects.filter(name=name).update(updated_at=timezone.now() - timedelta(hours=2))
+
+        # The same bytes arrive while the blob is unreferenced; the collection must leave them alone.
+        self.assertEqual(self.second.project_file.storage.save('project_files/copy.zip', ContentFile(b'final report')), name)
+        call_command('collect_project_files', stdout=StringIO())
+        self.assertTrue(self.second.project_file.storage.exists(name))
+        self.assertTrue(Blob.objects.filter(name=name).exists())
+
+        Blob.objects.filter(name=name).delete()
+        self.second.project_file.save('copy.zip', ContentFile(b'final report'))
+        self.assertEqual(Blob.objects.get(name=name).size, 12)
+        self.assertEqual(Blob.objects.get(name=name).ref_count, 1)
+
+    def test_download_keeps_the_uploaded_name(self):
+        self.first.project_file.save('report.zip', ContentFile(b'final report'), save=False)
+        self.first.project_file_name = 'report.zip'
+        self.first.save()
+        response = self.client.get(reverse('api-download-file', args=[self.first.project_id]))
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="report.zip"')
+
+
+class SparseFieldsetTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.projects = seed_catalog(3)
+        self.student = Student.objects.create(user=User.objects.create(username='sparse-student'), suid='sparse0001')
+        ProjectClaim.objects.create(project=self.projects[0]).students.add(self.student)
+
+    def test_listing_renders_and_loads_only_requested_fields(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('api-projects-list'), {'fields': 'title,is_available'})
+        self.assertEqual(response.status_code, 200)
+        for project in response.data['results']:
+            self.assertEqual(set(project), {'title', 'is_available'})
+        sql = ctx.captured_queries[-1]['sql']
+        self.assertNotIn('description', sql)
+        self.assertEqual(len(ctx.captured_queries), 2)
+
+        response = self.client.get(reverse('api-available-projects'), {'fields': 'title,nonsense'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_nested_project_fields_and_expand(self):
+        self.client.force_authenticate(self.student.user)
+        url = reverse('api-student-dashboard')
+        full = self.client.get(url).data[0]
+        claim = self.client.get(url, {'fields': 'id,project.title,project.is_available'}).data[0]
+        project = {'title': full['project']['title'], 'is_available': full['project']['is_available']}
+        self.assertEqual(claim, {'id': full['id'], 'project': project})
+
+        collapsed = self.client.get(url, {'fields': 'project'}).data[0]
+        self.assertEqual(collapsed, {'project': self.projects[0].pk})
+        expanded = self.client.get(url, {'fields': 'project', 'expand': 'project'}).data[0]
+        self.assertEqual(expanded['project'], full['project'])
+
+
+class FastSerializerTests(TestCase):
+    """The row-based fast path must render byte-for-byte what the serializers render."""
+
+    def setUp(self):
+        projects = seed_catalog(6)
+        now = timezone.now()
+        Project.objects.filter(pk__in=[project.pk for project in projects[::2]]).update(
+            claimed_at=now, file_upload_date=now.replace(microsecond=123456)
+        )
+        ProjectClaim.objects.filter(is_approved=True).update(approved_at=now)
+        self.factory_request = APIClient().get(reverse('api-projects-list')).wsgi_request
+
+    def assertSameJSON(self, fast, slow):
+        self.assertEqual(JSONRenderer().render(fast), JSONRenderer().render(slow))
+
+    def test_projects_match_project_serializer(self):
+        projects = ProjectSerializer.setup_eager_loading(Project.objects.order_by('id'))
+        self.assertSameJSON(
+            fast_serializers.serialize_projects(fast_serializers.project_values(Project.objects.order_by('id'))),
+            ProjectSerializer(projects, many=True).data,
+        )
+        request = Request(self.factory_request)
+        self.assertSameJSON(
+            fast_serializers.serialize_projects(fast_serializers.project_values(Project.objects.order_by('id')), request=request),
+            ProjectSerializer(projects, many=True, context={'request': request}).data,
+        )
+        fields = {'claimed_by': None, 'title': None, 'file_upload_date': None}
+        self.assertSameJSON(
+            fast_serializers.serialize_projects(fast_serializers.project_values(Project.objects.order_by('id'), fields), fields),
+            ProjectSerializer(projects, many=True, fields=fields).data,
+        )
+
+    def test_claims_match_project_claim_serializer(self):
+        claims = ProjectClaimSerializer.setup_eager_loading(ProjectClaim.objects.order_by('id'))
+        self.assertSameJSON(
+            fast_serializers.serialize_claims(fast_serializers.claim_values(ProjectClaim.objects.order_by('id'))),
+            ProjectClaimSerializer(claims, many=True).data,
+        )
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ImportCatalogTests(TestCase):
+
+    def write(self, name, content):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, name)
+        with open(path, 'w') as file:
+            file.write(content)
+        return path
+
+    def test_imports_valid_rows_and_reports_the_rest(self):
+        Student.objects.create(user=User.objects.create(username='taken'), suid='imp0000009')
+        path = self.write('students.csv', (
+            'username,password,email,first_name,last_name,suid,year_attended\n'
+            'imp-1,secret-1,imp1@example.com,Ada,One,imp0000001,2023\n'
+            'imp-2,,,Bo,Two,imp0000002,\n'
+            'imp-3,secret-3,not-an-email,Cy,Three,imp0000003,2023\n'
+            'taken,secret-4,,Di,Four,imp0000004,2023\n'
+            'imp-5,secret-5,,Ed,Five,imp0000001,2023\n'
+        ))
+        out, err = StringIO(), StringIO()
+        call_command('import_catalog', 'students', path, batch_size=2, workers=2, stdout=out, stderr=err)
+
+        self.assertIn('Imported 2 students', out.getvalue())
+        self.assertEqual(err.getvalue().splitlines(), [
+            'line 4: email: Enter a valid email address.',
+            'line 5: username taken already exists',
+            'line 6: suid imp0000001 appears earlier in the file',
+        ])
+        first = Student.objects.select_related('user').get(suid='imp0000001')
+        self.assertEqual((first.first_name, first.year_attended, first.user.email), ('Ada', 2023, 'imp1@example.com'))
+        self.assertTrue(first.user.check_password('secret-1'))
+        self.assertFalse(User.objects.get(username='imp-2').has_usable_password())
+
+    def test_projects_get_ids_and_search_entries(self):
+        professor = Professor.objects.create(user=User.objects.create(username='imp-prof'), suid='impp000001')
+        path = self.write('projects.jsonl', '\n'.join([
+            json.dumps({'professor': 'impp000001', 'title': 'Imported compilers', 'max_students': 3}),
+            json.dumps({'professor': 'impp000001', 'title': 'Imported robots', 'description': 'Line followers'}),
+            json.dumps({'professor': 'nobody', 'title': 'Orphan'}),
+        ]))
+        version = get_catalog_version()
+        call_command('import_catalog', 'projects', path, stdout=StringIO(), stderr=StringIO())
+
+        projects = list(Project.objects.filter(professor=professor).order_by('title'))
+        self.assertEqual([(p.title, p.max_students) for p in projects], [('Imported compilers', 3), ('Imported robots', 2)])
+        self.assertEqual(len({p.project_id for p in projects}), 2)
+        self.assertNotEqual(get_catalog_version(), version)
+        response = self.client.get(reverse('api-project-search'), {'search_query': 'robots', 'search_by': 'title'})
+        self.assertEqual([p['title'] for p in response.data['results']], ['Imported robots'])
+
+
+class SeedDataTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+
+    def seed(self, seed):
+        call_command('seed_data', professors=5, students=300, projects=40, seed=seed, stdout=StringIO())
+        claims = ProjectClaim.objects.order_by('pk')
+        return (
+            list(Student.objects.order_by('suid').values_list('suid', 'first_name', 'last_name', 'year_attended')),
+            list(Project.objects.order_by('title').values_list('title', 'professor__suid', 'max_students', 'is_available')),
+            [(claim.project.title, claim.is_approved, sorted(s.suid for s in claim.students.all())) for claim in claims],
+        )
+
+    def test_same_seed_same_dataset(self):
+        first = self.seed(7)
+        User.objects.filter(username__startswith='synthetic-').delete()
+        self.assertEqual(self.seed(7), first)
+        User.objects.filter(username__startswith='synthetic-').delete()
+        self.assertNotEqual(self.seed(8), first)
+        with self.assertRaises(CommandError):
+            self.seed(8)
+
+    def test_claims_fit_their_projects(self):
+        self.seed(1)
+        projects = Project.objects.annotate_actual_counts()
+        self.assertFalse(projects.exclude(actual_claimed=F('claimed_count')).exists())
+        self.assertFalse(projects.exclude(actual_pending=F('pending_claims_count')).exists())
+        self.assertFalse(
+            ProjectClaim.objects.annotate(size=Count('students')).filter(size__gt=F('project__max_students')).exists()
+        )
+        # Every approved group holds exactly one claim, on a project that is closed.
+        approved = ProjectClaim.objects.filter(is_approved=True)
+        self.assertTrue(approved.exists())
+        self.assertFalse(approved.filter(project__is_available=True).exists())
+        self.assertFalse(ProjectClaim.objects.filter(is_approved=False, students__projectclaim__is_approved=True).exists())
+        self.assertTrue(projects.filter(pending_claims_count__gt=1).exists())
+        with_files = Project.objects.exclude(project_file='').exclude(project_file=None)
+        self.assertTrue(with_files.exists())
+        for project in with_files:
+            self.assertTrue(project.project_file.storage.exists(project.project_file.name))
+            self.assertEqual(Blob.objects.get(name=project.project_file.name).ref_count, 1)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ClaimRushTests(LiveServerTestCase):
+
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+
+    def test_percentiles_use_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual([loadtest.percentile(values, pct) for pct in (50, 95, 99, 100)], [50, 95, 99, 100])
+        self.assertEqual(loadtest.percentile([7], 99), 7)
+        self.assertIsNone(loadtest.percentile([], 50))
+
+    def test_rush_reports_every_endpoint(self):
+        call_command('seed_data', professors=2, students=30, projects=6, password='rush', stdout=StringIO())
+        out = StringIO()
+        call_command(
+            'claim_rush', url=self.live_server_url, password='rush', students=12, ramp=0.5, concurrency=4, stdout=out,
+        )
+
+        table = [line.split() for line in out.getvalue().splitlines()]
+        rows = {cells[0]: cells for cells in table if cells[0] in loadtest.ENDPOINTS and cells[1].isdigit()}
+        self.assertEqual(set(rows), set(loadtest.ENDPOINTS))
+        # requests, then ok and 4xx: every login and listing succeeds, and every claim gets an answer.
+        self.assertEqual(rows['login'][1:4:2], ['12', '12'])
+        self.assertEqual(rows['available'][1:4:2], ['12', '12'])
+        self.assertEqual(int(rows['claim'][3]) + int(rows['claim'][4]), 12)
+        self.assertIn('No oversubscription violations', out.getvalue())
+
+    def test_violations_are_detected(self):
+        professor = Professor.objects.create(user=User.objects.create(username='rush-prof'), suid='rushp00001')
+        project = Project.objects.create(professor=professor, title='Rushed', description='', max_students=1)
+        students = [
+            Student.objects.create(user=User.objects.create(username=f'rush-{i}'), suid=f'rush{i:06d}') for i in range(2)
+        ]
+        since = timezone.now()
+        for student in students:
+            claim = ProjectClaim.objects.create(project=project, is_approved=True)
+            claim.students.add(student)
+            ProjectClaimRelation.objects.create(project=project, student=student)
+
+        violations = loadtest.oversubscription_violations(since)
+        self.assertEqual(violations['projects over max_students'], [project.project_id])
+        self.assertEqual(violations['projects with several approved claims'], [project.project_id])
+        self.assertEqual(violations['claims larger than the project allows'], [])
+
+
+@override_settings(REQUEST_TIMING={'SAMPLE_RATE': 1, 'SLOW_REQUEST_MS': 10 ** 6, 'N_PLUS_ONE_THRESHOLD': 5})
+class RequestTimingTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        seed_catalog(8)
+        slow_requests.clear()
+
+    def server_timing(self, response):
+        return {part.split(';')[0].strip(): part for part in response['Server-Timing'].split(',')}
+
+    def test_sampled_responses_carry_server_timing(self):
+        with self.assertLogs('professors_projects.timing', 'INFO') as logs:
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(reverse('api-projects-list'))
+        self.assertEqual(set(self.server_timing(response)), {'db', 'view', 'serialize', 'total'})
+        self.assertIn(f'desc="{len(ctx.captured_queries)} queries"', self.server_timing(response)['db'])
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual((record['path'], record['status'], record['queries']), ('/api/projects/', 200, len(ctx.captured_queries)))
+        self.assertEqual(record['n_plus_one'], [])
+        self.assertGreater(record['serialize_ms'], 0)
+        self.assertLessEqual(record['view_ms'] + record['serialize_ms'], record['total_ms'])
+
+    def test_view_time_leaves_out_the_middleware_before_it(self):
+        def slow_middleware_then_view(request):
+            time.sleep(0.05)
+            middleware.process_view(request, None, (), {})
+            return JsonResponse({})
+
+        middleware = RequestTimingMiddleware(slow_middleware_then_view)
+        with self.assertLogs('professors_projects.timing', 'INFO') as logs:
+            middleware(APIRequestFactory().get('/timed/'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertGreaterEqual(record['total_ms'], 50)
+        self.assertLess(record['view_ms'], 50)
+
+    async def test_async_view_time_leaves_out_the_middleware_before_it(self):
+        async def slow_middleware_then_view(request):
+            await asyncio.sleep(0.05)
+            await middleware.process_view(request, None, (), {})
+            await asyncio.sleep(0.02)
+            return JsonResponse({})
+
+        middleware = RequestTimingMiddleware(slow_middleware_then_view)
+        with self.assertLogs('professors_projects.timing', 'INFO') as logs:
+            await middleware(APIRequestFactory().get('/timed/'))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertGreaterEqual(record['total_ms'], 70)
+        self.assertGreaterEqual(record['view_ms'], 20)
+        self.assertLess(record['view_ms'], 50)
+
+    def test_unsampled_requests_are_left_alone(self):
+        with override_settings(REQUEST_TIMING={'SAMPLE_RATE': 0}):
+            response = self.client.get(reverse('api-projects-list'))
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_repeated_queries_are_flagged_and_slow_requests_kept(self):
+        def one_query_per_project(request):
+            for project in Project.objects.all():
+                Professor.objects.get(pk=project.professor_id)
+            return JsonResponse({})
+
+        request = APIRequestFactory().get('/n-plus-one/')
+        with override_settings(REQUEST_TIMING={'SAMPLE_RATE': 1, 'SLOW_REQUEST_MS': 0, 'N_PLUS_ONE_THRESHOLD': 5}):
+            with self.assertLogs('professors_projects.timing', 'WARNING') as logs:
+                RequestTimingMiddleware(one_query_per_project)(request)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(len(record['n_plus_one']), 1)
+        self.assertEqual(record['n_plus_one'][0]['count'], 8)
+        self.assertIn('"id" = ?', record['n_plus_one'][0]['sql'])
+
+        self.client.force_authenticate(User.objects.create(username='timing-admin', is_staff=True))
+        kept = self.client.get(reverse('api-request-timings')).data['slow_requests']
+        self.assertEqual([entry['path'] for entry in kept], ['/n-plus-one/'])
+        self.assertEqual(len(kept[0]['sql']), 9)
+
+    def test_query_templates_ignore_literals_and_list_lengths(self):
+        self.assertEqual(
+            instrumentation.query_template("SELECT * FROM t WHERE a IN (%s, %s, %s) AND b = 'x' LIMIT 21"),
+            instrumentation.query_template("SELECT * FROM t WHERE a IN (%s) AND b = 'it''s' LIMIT 3"),
+        )
+
+    @override_settings(ROOT_URLCONF='project_claiming_website.asgi_urls')
+    async def test_async_views_are_measured(self):
+        with self.assertLogs('professors_projects.timing', 'INFO'):
+            response = await self.async_client.get(reverse('api-available-projects'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('desc="0 queries"', self.server_timing(response)['db'])
+
+
+class ClaimExportTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        seed_catalog(4)
+        self.admin = User.objects.create(username='registrar', is_staff=True)
+        self.token = str(RefreshToken.for_user(self.admin).access_token)
+
+    def test_streams_approved_claims_as_csv(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(reverse('api-export-claims', args=['csv']))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="claims.csv"')
+        rows = list(csv.DictReader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual({row['status'] for row in rows}, {'approved'})
+        self.assertEqual(rows[0]['professor_name'], 'Prof seed0')
+        self.assertEqual(rows[0]['student_name'], 'Student 0-0')
+
+        tomorrow = (timezone.localdate() + timezone.timedelta(days=1)).isoformat()
+        response = self.client.get(reverse('api-export-claims', args=['ndjson']), {'status': 'all', 'since': tomorrow})
+        self.assertEqual(b''.join(response.streaming_content), b'')
+        response = self.client.get(reverse('api-export-claims', args=['ndjson']), {'until': 'last week'})
+        self.assertEqual(response.status_code, 400)
+
+        self.client.force_authenticate(User.objects.get(username='seed-student-0-0'))
+        self.assertEqual(self.client.get(reverse('api-export-claims', args=['csv'])).status_code, 403)
+
+    def test_command_matches_endpoint(self):
+        out, err = StringIO(), StringIO()
+        call_command('export_claims', format='ndjson', status='all', stdout=out, stderr=err)
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(records), 8)
+        self.assertEqual({record['status'] for record in records}, {'approved', 'pending'})
+        self.assertIn('Exported 8 rows of all claims', err.getvalue())
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(reverse('api-export-claims', args=['ndjson']), {'status': 'all'})
+        self.assertEqual(b''.join(response.streaming_content).decode(), out.getvalue())
+
+    @override_settings(ROOT_URLCONF='project_claiming_website.asgi_urls')
+    async def test_async_export_streams_the_same_rows(self):
+        url = reverse('api-export-claims', args=['csv'])
+        response = await self.async_client.get(url, headers={'Authorization': f'Bearer {self.token}'})
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        out = StringIO()
+        await sync_to_async(call_command)('export_claims', stdout=out, stderr=StringIO())
+        self.assertEqual(body.decode(), out.getvalue())
+        self.assertEqual((await self.async_client.get(url)).status_code, 401)
+
+
+class QueryPlanTests(TestCase):
+    """
+    EXPLAIN QUERY PLAN every query behind the hot endpoints: each table must be reached through an
+    index. A plain SCAN is only accepted for an unfiltered page walk (no WHERE, with a LIMIT), and a
+    SCAN of a partial index is accepted because that index only holds the matching rows.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.projects = seed_catalog(30)
+        self.student = Student.objects.get(suid='see0001000')
+        self.professor = self.projects[0].professor
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql LIKE '% WHERE %'")
+            self.partial_indexes = {name for name, in cursor.fetchall()}
+
+    def full_scans(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            details = [row[3] for row in cursor.fetchall()]
+        scans = []
+        for detail in details:
+            if not detail.startswith('SCAN ') or 'VIRTUAL TABLE' in detail:
+                continue
+            index = re.search(r'USING (?:COVERING )?INDEX (\w+)', detail)
+            if index and index.group(1) in self.partial_indexes:
+                continue
+            if ' USING ' not in detail and ' WHERE ' not in sql and ' LIMIT ' in sql:
+                continue
+            scans.append(f'{detail}: {sql}')
+        return scans
+
+    def assertIndexed(self, request):
+        with CaptureQueriesContext(connection) as ctx:
+            response = request()
+        self.assertLess(response.status_code, 500)
+        scans = [scan for query in ctx.captured_queries if query['sql'].startswith('SELECT') for scan in self.full_scans(query['sql'])]
+        self.assertEqual(scans, [])
+        return response
+
+    def test_listings_and_search(self):
+        for name, params in [
+            ('api-projects-list', {'page_size': 5}),
+            ('api-available-projects', {'page_size': 5}),
+            ('api-completed-projects', {'page_size': 5}),
+            ('api-project-search', {'availability': 'available', 'capacity': 2}),
+            ('api-project-search', {'availability': 'taken'}),
+            ('api-project-search', {'capacity': 2}),
+            ('api-project-search', {'search_query': 'seed', 'search_by': 'title'}),
+        ]:
+            with self.subTest(name=name, params=params):
+                response = self.assertIndexed(lambda: self.client.get(reverse(name), params))
+                if response.data.get('next'):
+                    self.assertIndexed(lambda: self.client.get(response.data['next']))
+
+    def test_dashboards_and_claims(self):
+        self.client.force_authenticate(self.student.user)
+        self.assertIndexed(lambda: self.client.get(reverse('api-student-dashboard')))
+        available = Project.objects.filter(is_available=True).first()
+        self.assertIndexed(lambda: self.client.post(
+            reverse('api-claim-project', args=[available.project_id]), {'student_ids': [self.student.suid]}, format='json'
+        ))
+
+        self.client.force_authenticate(self.professor.user)
+        self.assertIndexed(lambda: self.client.get(reverse('api-professor-dashboard')))
+        pending = ProjectClaim.objects.filter(project__professor=self.professor, is_approved=False).first()
+        self.assertIndexed(lambda: self.client.post(reverse('api-approve-claim'), {
+            'project_id': pending.project.project_id, 'student_id': pending.students.first().suid, 'status': True,
+        }, format='json'))
+
+
+class ProjectCounterTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.professor = Professor.objects.create(user=User.objects.create(username='count-prof'), suid='countp0001')
+        self.project = Project.objects.create(professor=self.professor, title='Counted', description='', max_students=2)
+        self.other = Project.objects.create(professor=self.professor, title='Other', description='', max_students=2)
+        self.students = [
+            Student.objects.create(user=User.objects.create(username=f'count-{i}'), suid=f'count{i:05d}') for i in range(3)
+        ]
+
+    def claim(self, project, *students):
+        self.client.force_authenticate(students[0].user)
+        return self.client.post(
+            reverse('api-claim-project', args=[project.project_id]),
+            {'student_ids': [student.suid for student in students]},
+            format='json',
+        )
+
+    def assertCounts(self, project, claimed, pending):
+        project.refresh_from_db()
+        self.assertEqual((project.claimed_count, project.pending_claims_count), (claimed, pending))
+
+    def test_counters_follow_claims_and_approvals(self):
+        self.claim(self.project, self.students[0], self.students[1])
+        self.claim(self.project, self.students[2])
+        self.claim(self.other, self.students[1])
+        self.assertCounts(self.project, 0, 2)
+        self.assertCounts(self.other, 0, 1)
+
+        self.client.force_authenticate(self.professor.user)
+        response = self.client.post(
+            reverse('api-approve-claim'), {'project_id': self.project.project_id, 'student_id': self.students[0].suid, 'status': True},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertCounts(self.project, 2, 1)
+        self.assertCounts(self.other, 0, 0)
+
+        self.client.force_authenticate(self.students[2].user)
+        self.client.delete(reverse('api-student-cancel-claim', args=[self.project.project_id]))
+        self.assertCounts(self.project, 2, 0)
+
+        self.project.claimed_by.remove(self.students[0])
+        self.assertCounts(self.project, 1, 0)
+        self.project.claimed_by.add(self.students[2])
+        self.assertCounts(self.project, 2, 0)
+        self.project.claimed_by.clear()
+        self.assertCounts(self.project, 0, 0)
+
+    def test_counters_follow_claims_edited_through_save(self):
+        claim = ProjectClaim.objects.create(project=self.project)
+        self.assertCounts(self.project, 0, 1)
+        claim.is_approved = True
+        claim.save()
+        self.assertCounts(self.project, 0, 0)
+        claim.is_approved = False
+        claim.project = self.other
+        claim.save()
+        self.assertCounts(self.project, 0, 0)
+        self.assertCounts(self.other, 0, 1)
+        claim.is_approved = True
+        claim.save()
+        claim.delete()
+        self.assertCounts(self.other, 0, 0)
+
+    def test_capacity_check_reads_the_counter(self):
+        ProjectClaimRelation.objects.create(project=self.project, student=self.students[0])
+        response = self.claim(self.project, self.students[1], self.students[2])
+        self.assertEqual(response.data['message'], 'Project already claimed by the maximum number of students')
+
+    def test_reconcile_command_reports_and_fixes_drift(self):
+        self.claim(self.project, self.students[0])
+        Project.objects.filter(pk=self.project.pk).update(claimed_count=5, pending_claims_count=0)
+
+        out = StringIO()
+        call_command('reconcile_project_counters', '--dry-run', stdout=out)
+        self.assertIn(f'Project {self.project.project_id}: claimed_count 5 -> 0, pending_claims_count 0 -> 1', out.getvalue())
+        self.assertCounts(self.project, 5, 0)
+
+        call_command('reconcile_project_counters', stdout=StringIO())
+        self.assertCounts(self.project, 0, 1)
+
+
+class ClaimProjectTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.professor = Professor.objects.create(user=User.objects.create(username='group-prof'), suid='groupp0001')
+        self.project = Project.objects.create(professor=self.professor, title='Group', description='', max_students=4)
+        self.students = [
+            Student.objects.create(user=User.objects.create(username=f'group-{i}'), suid=f'group{i:05d}') for i in range(4)
+        ]
+        self.client.force_authenticate(self.students[0].user)
+
+    def claim(self, student_ids):
+        return self.client.post(reverse('api-claim-project', args=[self.project.project_id]), {'student_ids': student_ids}, format='json')
+
+    def test_group_claim_query_count(self):
+        # Resolving, conflict-checking and linking the students take one query each, whatever the group size.
+        with self.assertNumQueries(12):
+            response = self.claim([student.suid for student in self.students])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(ProjectClaim.objects.get(project=self.project).students.all()), set(self.students))
+
+    def test_duplicate_claim_names_the_first_student_in_request_order(self):
+        self.claim([self.students[1].suid, self.students[3].suid])
+        response = self.claim([self.students[0].suid, self.students[3].suid, self.students[1].suid])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['message'], f'Student {self.students[3].suid} has already claimed this project')
+
+    def test_student_ids_must_be_a_non_empty_list(self):
+        for student_ids in [[], 'abc', self.students[0].suid, {'a': 1}, [None], [True], [['x']], ['']]:
+            with self.subTest(student_ids=student_ids):
+                response = self.claim(student_ids)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.data['message'], 'student_ids must be a non-empty list of student IDs')
+        response = self.client.post(reverse('api-claim-project', args=[self.project.project_id]), {}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ProjectClaim.objects.exists())
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.pending_claims_count, 0)
+
+
+class ApproveClaimTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.professor = Professor.objects.create(user=User.objects.create(username='appr-prof'), suid='apprp00001')
+        self.students = [
+            Student.objects.create(user=User.objects.create(username=f'appr-{i}'), suid=f'appr{i:06d}') for i in range(4)
+        ]
+        self.client.force_authenticate(self.professor.user)
+
+    def project(self, max_students, *groups):
+        project = Project.objects.create(professor=self.professor, title=f'Approve {max_students}', description='', max_students=max_students)
+        for group in groups:
+            ProjectClaim.objects.create(project=project).students.add(*group)
+        Project.objects.filter(pk=project.pk).reset_counts()
+        return project
+
+    def assertClaimed(self, project, claimed, pending):
+        project.refresh_from_db()
+        self.assertEqual(
+            (project.claimed_count, project.pending_claims_count, ProjectClaimRelation.objects.filter(project=project).count()),
+            (claimed, pending, claimed),
+        )
+
+    def test_batch_approves_one_claim_per_project(self):
+        project = self.project(2, self.students[:2], self.students[2:])
+        response = self.client.post(reverse('api-approve-claims'), {'decisions': [
+            {'project_id': project.project_id, 'student_id': self.students[0].suid, 'status': True},
+            {'project_id': project.project_id, 'student_id': self.students[2].suid, 'status': True},
+        ]}, format='json')
+
+        self.assertEqual([result['result'] for result in response.data['results']], ['approved', 'error'])
+        self.assertEqual(response.data['results'][1]['message'], 'Project is already claimed')
+        self.assertClaimed(project, 2, 1)
+        self.assertFalse(ProjectClaim.objects.get(students=self.students[2]).is_approved)
+
+    def test_single_approval_refuses_a_closed_project(self):
+        project = self.project(1, self.students[:1], self.students[1:2])
+        url = reverse('api-approve-claim')
+        first = self.client.post(url, {'project_id': project.project_id, 'student_id': self.students[0].suid, 'status': True}, format='json')
+        second = self.client.post(url, {'project_id': project.project_id, 'student_id': self.students[1].suid, 'status': True}, format='json')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual((second.status_code, second.data['message']), (400, 'Project is already claimed'))
+        self.assertClaimed(project, 1, 1)
+
+    def test_approve_checks_room_for_the_group(self):
+        project = self.project(2, self.students[1:3])
+        ProjectClaimRelation.objects.create(project=project, student=self.students[0])
+        claim = ProjectClaim.objects.get(project=project)
+        with self.assertRaises(ProjectAlreadyClaimed):
+            claim.approve()
+        self.assertClaimed(project, 1, 1)
+        self.assertFalse(ProjectClaim.objects.get(pk=claim.pk).is_approved)
+
+    def test_approve_returns_none_when_already_approved(self):
+        project = self.project(2, self.students[:2], self.students[2:3])
+        claim = ProjectClaim.objects.get(students=self.students[0])
+        self.assertEqual(claim.approve(), [])
+        self.assertIsNone(ProjectClaim.objects.get(pk=claim.pk).approve())
+        self.assertClaimed(project, 2, 1)
+
+
+# The claims here queue on the write lock on purpose; keep them out of the slow-request warnings.
+@override_settings(REQUEST_TIMING={'SAMPLE_RATE': 0})
+class ConcurrentClaimTests(TransactionTestCase):
+    """Hundreds of simultaneous claims and approvals racing for a project's last seat."""
+
+    num_requests = 300
+
+    def setUp(self):
+        self.professor = Professor.objects.create(user=User.objects.create(username='rush-prof'), suid='rushp00001')
+        self.project = Project.objects.create(professor=self.professor, title='Rush', description='', max_students=3)
+        self.students = [
+            Student.objects.create(user=User.objects.create(username=f'rush-{i}'), suid=f'rush{i:06d}')
+            for i in range(42)
+        ]
+        # Two of the three seats are already taken, so only a single student still fits.
+        for student in self.students[:2]:
+            ProjectClaimRelation.objects.create(project=self.project, student=student)
+        self.students = self.students[2:]
+
+    def request(self, user, name, data, args=()):
+        client = APIClient()
+        client.force_authenticate(user)
+        try:
+            response = client.post(reverse(name, args=args), data, format='json')
+            return response.status_code, response.data['message']
+        finally:
+            connection.close()
+
+    def claim(self, group):
+        return self.request(
+            group[0].user, 'api-claim-project', {'student_ids': [student.suid for student in group]}, [self.project.project_id]
+        )
+
+    def approve(self, suid):
+        return self.request(
+            self.professor.user, 'api-approve-claim', {'project_id': self.project.project_id, 'student_id': suid, 'status': True}
+        )
+
+    def test_parallel_claims_compete_for_the_last_seat(self):
+        self.assertEqual(Project.objects.get(pk=self.project.pk).claimed_count, 2)
+        rng = random.Random(42)
+        groups = [rng.sample(self.students, rng.randint(1, 3)) for _ in range(self.num_requests)]
+
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            results = list(pool.map(self.claim, groups))
+
+        statuses = [status_code for status_code, _ in results]
+        self.assertTrue(set(statuses) <= {200, 400}, results)
+        self.assertEqual(statuses.count(200), ProjectClaim.objects.filter(project=self.project).count())
+        for group, (status_code, message) in zip(groups, results):
+            if len(group) > 1:
+                self.assertEqual(status_code, 400)
+        self.assertIn((400, 'Project already claimed by the maximum number of students'), results)
+
+        claims = list(ProjectClaim.objects.filter(project=self.project).prefetch_related('students'))
+        self.assertGreater(len(claims), 1)
+        self.assertTrue(all(len(claim.students.all()) == 1 for claim in claims))
+        claimed_suids = [claim.students.all()[0].suid for claim in claims]
+        self.assertEqual(len(claimed_suids), len(set(claimed_suids)))
+
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            results = list(pool.map(self.approve, claimed_suids))
+
+        self.assertEqual([status_code for status_code, _ in results].count(200), 1, results)
+        self.assertTrue(all(status_code in (200, 400, 404) for status_code, _ in results), results)
+        project = Project.objects.annotate_actual_counts().get(pk=self.project.pk)
+        self.assertFalse(project.is_available)
+        self.assertEqual((project.claimed_count, project.actual_claimed), (3, 3))
+        # The losing claims stay pending, refused by the guarded update rather than deleted.
+        self.assertEqual((project.pending_claims_count, project.actual_pending), (len(claims) - 1, len(claims) - 1))
+        self.assertEqual(ProjectClaim.objects.filter(project=self.project, is_approved=True).count(), 1)
+
+
+class ProjectIdAllocationTests(TransactionTestCase):
+
+    def setUp(self):
+        self.professor = Professor.objects.create(user=User.objects.create(username='alloc-prof'), suid='allocp0001')
+
+    def create_project(self, i):
+        try:
+            return Project.objects.create(professor=self.professor, title=f'Parallel {i}', description='').project_id
+        finally:
+            connection.close()
+
+    def test_parallel_creates_get_distinct_ids(self):
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            project_ids = list(pool.map(self.create_project, range(100)))
+        self.assertEqual(len(set(project_ids)), 100)
+        self.assertEqual(sorted(project_ids), [str(value) for value in range(1000, 1100)])
+
+    def test_blocks_and_reuse_after_exhaustion(self):
+        self.assertEqual(Project.allocate_project_ids(3), ['1000', '1001', '1002'])
+
+        project = Project.objects.create(professor=self.professor, title='Doomed', description='')
+        self.assertEqual(project.project_id, '1003')
+        project.delete()
+
+        Sequence.objects.filter(name=Project.PROJECT_ID_SEQUENCE).update(last_value=Project.MAX_PROJECT_ID - 1)
+        self.assertEqual(Project.allocate_project_ids(2), ['9999', '1003'])
+        self.assertFalse(FreedProjectId.objects.exists())
+        with self.assertRaises(ProjectIdsExhausted):
+            Project.allocate_project_ids()
@@ -0,0 +1,232 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+from .models import UploadSession
+
+CHUNK_SIZE = 64 * 1024
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+# Chunks of one session are written one at a time. A fixed set of locks shared by hashing the
+# session id keeps the memory bounded however many uploads are abandoned; across workers the
+# conditional update of `received` catches overlapping writes.
+_session_locks = [threading.Lock() for _ in range(64)]
+
+# Running SHA-256 state of recent sessions, so each chunk is hashed once as it is written. Only a
+# bounded number are kept; a chunk on a worker without the state rebuilds it from the part file.
+# The final chunk stores the digest on the session, so completing costs no rehash on any worker.
+MAX_RUNNING_HASHES = 256
+_hashers = OrderedDict()
+_hashers_lock = threading.Lock()
+
+
+class UploadError(Exception):
+    def __init__(self, message, status):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+class PartialUpload(File):
+    # FileSystemStorage moves files that expose a temporary path instead of copying them.
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def max_upload_size():
+    return getattr(settings, 'PROJECT_FILE_MAX_UPLOAD_SIZE', 200 * 1024 * 1024)
+
+
+def upload_expiry():
+    return timedelta(seconds=getattr(settings, 'PROJECT_FILE_UPLOAD_EXPIRY', 24 * 60 * 60))
+
+
+def upload_dir():
+    return getattr(settings, 'PROJECT_FILE_UPLOAD_DIR', os.path.join(settings.BASE_DIR, 'partial_uploads'))
+
+
+def partial_path(session):
+    directory = upload_dir()
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f'{session.pk}.part')
+
+
+def parse_content_range(header):
+    match = CONTENT_RANGE_RE.match(header or '')
+    if not match:
+        raise UploadError('Content-Range must look like "bytes start-end/total"', 400)
+    start, end, total = map(int, match.groups())
+    if end < start:
+        raise UploadError('Content-Range end is before its start', 400)
+    return start, end, total
+
+
+def session_lock(session):
+    return _session_locks[hash(session.pk) % len(_session_locks)]
+
+
+def received_bytes(session):
+    # Re-read from the database, since another worker may have taken the upload further or cleanup removed it.
+    received = UploadSession.objects.filter(pk=session.pk).values_list('received', flat=True).first()
+    if received is None:
+        raise UploadError('Upload not found', 404)
+    session.received = received
+    return received
+
+
+def running_hash(session, path):
+    with _hashers_lock:
+        offset, hasher = _hashers.get(session.pk, (None, None))
+    if offset == session.received:
+        # A copy, so a chunk that fails part way cannot corrupt the kept state.
+        return hasher.copy()
+    return file_hash(path, session.received)
+
+
+def keep_running_hash(session, hasher):
+    with _hashers_lock:
+        _hashers[session.pk] = (session.received, hasher)
+        _hashers.move_to_end(session.pk)
+        while len(_hashers) > MAX_RUNNING_HASHES:
+            _hashers.popitem(last=False)
+
+
+def forget_running_hash(session):
+    with _hashers_lock:
+        _hashers.pop(session.pk, None)
+
+
+def file_hash(path, size):
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as partial:
+        remaining = size
+        while remaining:
+            chunk = partial.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            hasher.update(chunk)
+            remaining -= len(chunk)
+    return hasher
+
+
+def write_chunk(session, content_range, content_length, stream):
+    """
+    Append one chunk to the session's partial file, hashing it on the way through. The chunk must
+    start where the previous one ended, and its size is checked against the session before any
+    of the body is read. Returns the number of bytes received so far.
+    """
+    start, end, total = parse_content_range(content_range)
+    length = end - start + 1
+    if total != session.size or end >= session.size:
+        raise UploadError(f'This upload is {session.size} bytes long', 413)
+    if content_length is None:
+        raise UploadError('Content-Length is required', 411)
+    if content_length != length:
+        raise UploadError('Content-Length does not match Content-Range', 400)
+
+    path = partial_path(session)
+    with session_lock(session):
+        if start != received_bytes(session):
+            raise UploadError(f'Expected a chunk starting at byte {session.received}', 409)
+        hasher = running_hash(session, path) if session.received else hashlib.sha256()
+
+        with open(path, 'r+b' if session.received else 'wb') as partial:
+            partial.seek(start)
+            remaining = length
+            while remaining:
+                chunk = stream.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                partial.write(chunk)
+                hasher.update(chunk)
+                remaining -= len(chunk)
+            if remaining:
+                # The connection dropped mid-chunk; keep what was written and let the client resume.
+                length -= remaining
+            partial.truncate(start + length)
+
+        digest = hasher.hexdigest() if start + length == session.size else ''
+        updated = UploadSession.objects.filter(pk=session.pk, received=start).update(
+            received=start + length, sha256=digest, updated_at=timezone.now(),
+        )
+        if not updated:
+            # Another worker wrote this range at the same time; make the client re-check the offset.
+            forget_running_hash(session)
+            raise UploadError(f'Expected a chunk starting at byte {received_bytes(session)}', 409)
+        session.received = start + length
+        session.sha256 = digest
+        if digest:
+            forget_running_hash(session)
+        else:
+            keep_running_hash(session, hasher)
+    if remaining:
+        raise UploadError(f'Chunk ended early; resume from byte {session.received}', 400)
+    return session.received
+
+
+def finish(session):
+    """Check the upload is complete and return (sha256 hex digest, File to store)."""
+    if session.received != session.size:
+        raise UploadError(f'Upload is incomplete: {session.received} of {session.size} bytes received', 409)
+    path = partial_path(session)
+    # Set by the final chunk; only sessions completed before digests were stored need the rehash.
+    digest = session.sha256 or file_hash(path, session.received).hexdigest()
+    upload = PartialUpload(open(path, 'rb'), name=session.filename)
+    upload.sha256 = digest
+    return digest, upload
+
+
+def discard(session):
+    forget_running_hash(session)
+    try:
+        os.remove(partial_path(session))
+    except FileNotFoundError:
+        pass
+
+
+def expire_sessions(dry_run=False):
+    """
+    Delete unfinished uploads that have received nothing for PROJECT_FILE_UPLOAD_EXPIRY, with their
+    partial files, and partial files no unfinished upload owns any more (e.g. its project was
+    deleted). Returns the number of uploads expired, and of files removed with the bytes they held.
+    """
+    cutoff = timezone.now() - upload_expiry()
+    stale = set(
+        str(pk) for pk in UploadSession.objects.filter(completed_at__isnull=True, updated_at__lt=cutoff)
+        .values_list('pk', flat=True)
+    )
+    if not dry_run:
+        # Rechecked in the DELETE, so an upload resumed since it was read is kept.
+        UploadSession.objects.filter(pk__in=stale, updated_at__lt=cutoff).delete()
+    live = set(str(pk) for pk in UploadSession.objects.filter(completed_at__isnull=True).values_list('pk', flat=True))
+    if not dry_run:
+        stale -= live
+        with _hashers_lock:
+            for upload_id in [upload_id for upload_id in _hashers if str(upload_id) in stale]:
+                del _hashers[upload_id]
+
+    directory = upload_dir()
+    removed, reclaimed = 0, 0
+    for name in (os.listdir(directory) if os.path.isdir(directory) else []):
+        upload_id, extension = os.path.splitext(name)
+        path = os.path.join(directory, name)
+        if extension != '.part' or (upload_id in live and upload_id not in stale):
+            continue
+        try:
+            info = os.stat(path)
+        except FileNotFoundError:
+            continue
+        if upload_id in stale or info.st_mtime < cutoff.timestamp():
+            if not dry_run:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+            removed += 1
+            reclaimed += info.st_size
+    return len(stale), removed, reclaimed
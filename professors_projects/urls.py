@@ -10,6 +10,7 @@ urlpatterns = [
     path('api/projects/', views.ProjectListView.as_view(), name='api-projects-list'),
     path('api/claim-project/<int:project_id>/', ClaimProjectView.as_view(), name='api-claim-project'),
     path('api/approve-claim/', ApproveClaimRequestView.as_view(), name='api-approve-claim'),
+    path('api/approve-claims/', views.BatchApproveClaimsView.as_view(), name='api-approve-claims'),
     path('api/professor-dashboard/', ProfessorDashboardView.as_view(), name='api-professor-dashboard'),
     path('api/student-dashboard/', views.StudentDashboardView.as_view(), name='api-student-dashboard'),
     path('api/login/', views.UserLoginView.as_view(), name='api-user-login'),
@@ -18,8 +19,15 @@ urlpatterns = [
     path('api/project-search/', views.ProjectSearchView.as_view(), name='api-project-search'),
     path('api/create-project/', views.CreateProjectView.as_view(), name='api-create-project'),
     path('api/upload-file/<int:project_id>/', views.UploadFileView.as_view(), name='api-upload-file'),
+    path('api/upload-file/<int:project_id>/sessions/', views.CreateUploadSessionView.as_view(), name='api-create-upload-session'),
+    path('api/uploads/<uuid:upload_id>/', views.UploadSessionView.as_view(), name='api-upload-session'),
+    path('api/uploads/<uuid:upload_id>/complete/', views.CompleteUploadSessionView.as_view(), name='api-complete-upload'),
     path('api/download-file/<int:project_id>/', views.DownloadProjectFile.as_view(), name='api-download-file'),
     path('api/completed-projects/', views.CompletedProjectsView.as_view(), name='api-completed-projects'),
+    path('api/project-events/', views.project_event_stream_unavailable, name='api-project-events'),
+    path('api/exports/claims.<str:export_format>', views.ClaimExportView.as_view(), name='api-export-claims'),
+    path('api/cache-stats/', views.CatalogCacheStatsView.as_view(), name='api-cache-stats'),
+    path('api/request-timings/', views.RequestTimingView.as_view(), name='api-request-timings'),
     path('api/student-cancel-claim/<int:project_id>/', views.StudentCancelClaimView.as_view(), name='api-student-cancel-claim'),
     path('api/professor-cancel-claim/<int:project_id>/<int:student_id>/', views.ProfessorCancelClaimView.as_view(), name='api-professor-cancel-claim'),
 ]
@@ -1,74 +1,142 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, generics
-from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.authentication import TokenAuthentication
-from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.exceptions import ValidationError
 from rest_framework.parsers import MultiPartParser
 from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
 from django.contrib.auth.models import User
-from django.http import JsonResponse, FileResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.db import transaction
+from django.db.models import Q
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth import authenticate, login, logout
-from .models import Professor, Project, Student, ProjectClaim
-from .serializers import ProfessorSerializer, ProjectSerializer, StudentSerializer, ProjectClaimSerializer
+from .authentication import ClaimsJWTAuthentication, ClaimsRefreshToken
+from .models import Professor, Project, Student, ProjectClaim, ProjectAlreadyClaimed, ProjectIdsExhausted, UploadSession, dashboard_marker
+from .pagination import ProjectCursorPagination
+from . import search
+from .cache import catalog_cache, request_catalog_version
+from .instrumentation import slow_requests, timing_config
+from .events import project_changed, project_events, format_event
+from .files import serve_project_file
+from . import exports, uploads
+from .serializers import ProfessorSerializer, ProjectSerializer, StudentSerializer, ProjectClaimSerializer, ProjectClaimSummarySerializer, parse_fieldset, validate_fields
+from .fast_serializers import PROJECT_FIELDS, claim_values, project_values, serialize_claims, serialize_projects
+from collections import defaultdict
 from datetime import datetime
+import asyncio
 import logging
+import os
+import re
+
+EVENT_STREAM_HEARTBEAT = 15
+EVENT_STREAM_RETRY_MS = 3000
+SHA256_RE = re.compile(r'^[0-9a-fA-F]{64}$')
+
+
+def catalog_etag(request, *args, **kwargs):
+    return f'catalog-{request_catalog_version(request)}'
+
+def dashboard_etag(role):
+    # Per-user ETag for a dashboard, from one aggregate over the user's own claims or projects,
+    # so other students' claims elsewhere keep the conditional polls answering 304.
+    def etag_func(request, *args, **kwargs):
+        if not hasattr(request.user, role):
+            return None
+        return f'{role}-{request.user.pk}-{dashboard_marker(role, getattr(request.user, role))}'
+    return etag_func
+
+def filter_project_search(queryset, params):
+    # Shared by ProjectSearchView and its async twin; returns the cursor ordering to use, if any.
+    ordering = None
+
+    availability = params.get('availability')
+    if availability:
+        if availability == 'available':
+            queryset = queryset.filter(is_available=True)
+        elif availability == 'taken':
+            queryset = queryset.filter(is_available=False)
+
+    capacity = params.get('capacity')
+    if capacity:
+        queryset = queryset.filter(max_students=capacity)
+
+    search_query = params.get('search_query')
+    search_by = params.get('search_by') or 'all'
+    if search_query and search_by in search.SEARCH_COLUMNS:
+        if search.is_supported():
+            queryset = search.search_projects(queryset, search_query, search_by)
+            ordering = ('search_rank',)
+        elif search_by == 'title':
+            queryset = queryset.filter(title__icontains=search_query)
+        elif search_by == 'description':
+            queryset = queryset.filter(description__icontains=search_query)
+        elif search_by == 'professor':
+            queryset = queryset.filter(professor__first_name__icontains=search_query) | \
+                       queryset.filter(professor__last_name__icontains=search_query)
+        else:
+            queryset = queryset.filter(
+                Q(title__icontains=search_query) | Q(description__icontains=search_query) |
+                Q(professor__first_name__icontains=search_query) | Q(professor__last_name__icontains=search_query)
+            )
+
+    return queryset, ordering
+
+def paginate_projects(request, queryset, ordering=None, absolute_urls=False):
+    """
+    One cursor page of projects honouring ?fields=, rendered from values() rows by the fast path.
+    absolute_urls matches the ListAPIView-based views, whose serializer context made file URLs absolute.
+    """
+    fields = parse_fieldset(request.query_params).get('fields')
+    if fields is not None:
+        validate_fields(fields, PROJECT_FIELDS)
+    paginator = ProjectCursorPagination()
+    if ordering:
+        paginator.ordering = ordering
+    # The cursor is built from the last row, so the ordering columns have to be selected too.
+    rows = project_values(queryset, fields, *(name.lstrip('-') for name in ordering or ()))
+    page = paginator.paginate_queryset(rows, request)
+    data = serialize_projects(page, fields, request if absolute_urls else None)
+    return paginator.get_paginated_response(data).data
 
 @method_decorator(csrf_exempt, name='dispatch')
 class ProjectSearchView(generics.ListAPIView):
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
+    pagination_class = ProjectCursorPagination
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
-
-        availability = self.request.query_params.get('availability')
-        if availability:
-            if availability == 'available':
-                queryset = queryset.filter(is_available=True)
-            elif availability == 'taken':
-                queryset = queryset.filter(is_available=False)
-
-        capacity = self.request.query_params.get('capacity')
-        if capacity:
-            queryset = queryset.filter(max_students=capacity)
-
-        search_query = self.request.query_params.get('search_query')
-        search_by = self.request.query_params.get('search_by')
-        if search_query and search_by:
-            if search_by == 'title':
-                queryset = queryset.filter(title__icontains=search_query)
-            elif search_by == 'professor':
-                queryset = queryset.filter(professor__first_name__icontains=search_query) | \
-                           queryset.filter(professor__last_name__icontains=search_query)
-
-        return queryset
+    def list(self, request, *args, **kwargs):
+        queryset, ordering = filter_project_search(self.get_queryset(), request.query_params)
+        return Response(paginate_projects(request, queryset, ordering, absolute_urls=True))
 
     
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(condition(etag_func=catalog_etag), name='get')
 class ProfessorListView(APIView):
     def get(self, request):
-        professors = Professor.objects.all()
-        serializer = ProfessorSerializer(professors, many=True)
-        return Response(serializer.data)
+        def build():
+            professors = Professor.objects.select_related('user')
+            return ProfessorSerializer(professors, many=True).data
+
+        return Response(catalog_cache.get_or_build('professors', request, build))
     
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(condition(etag_func=catalog_etag), name='get')
 class ProjectListView(APIView):
     def get(self, request):
-        projects = Project.objects.all()
-        serializer = ProjectSerializer(projects, many=True)
-        return Response(serializer.data)
+        return Response(catalog_cache.get_or_build(
+            'projects', request, lambda: paginate_projects(request, Project.objects.all())
+        ))
 
 @method_decorator(csrf_exempt, name='dispatch')
 class ClaimProjectView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated] 
 
     def post(self, request, project_id):
@@ -77,16 +145,14 @@ class ClaimProjectView(APIView):
         except Project.DoesNotExist:
             return Response({'message': 'Project not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        student_ids = request.data.get('student_ids', [])
+        student_ids = request.data.get('student_ids')
+        if (
+            not isinstance(student_ids, list) or not student_ids
+            or not all(isinstance(suid, (int, str)) and not isinstance(suid, bool) and str(suid) for suid in student_ids)
+        ):
+            return Response({'message': 'student_ids must be a non-empty list of student IDs'}, status=status.HTTP_400_BAD_REQUEST)
 
-        invalid_ids = []
-        valid_students = []
-        for suid in student_ids:
-            try:
-                student = Student.objects.get(suid=suid)
-                valid_students.append(student)
-            except Student.DoesNotExist:
-                invalid_ids.append(suid)
+        valid_students, invalid_ids = Student.objects.resolve(student_ids)
 
         if invalid_ids:
             return Response({'message': f"One or more student IDs are invalid: {', '.join(invalid_ids)}"}, status=status.HTTP_400_BAD_REQUEST)
@@ -94,29 +160,41 @@ class ClaimProjectView(APIView):
         if len(valid_students) > project.max_students:
             return Response({'message': f'You can only claim the project for up to {project.max_students} students'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if ProjectClaim.objects.filter(project=project, is_approved=True).exists():
-            return Response({'message': 'This project is already approved for another student'}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            # Every check below runs under the project lock, so concurrent claims are admitted one at a time.
+            project = Project.lock(project.pk)
 
-        accepted_claims = ProjectClaim.objects.filter(students__in=valid_students, is_approved=True)
-        if accepted_claims.exists():
-            return Response({'message': 'One or more students already have an accepted project'}, status=status.HTTP_400_BAD_REQUEST)
+            if ProjectClaim.objects.filter(project=project, is_approved=True).exists():
+                return Response({'message': 'This project is already approved for another student'}, status=status.HTTP_400_BAD_REQUEST)
 
-        for student in valid_students:
-            if ProjectClaim.objects.filter(project=project, students=student).exists():
-                return Response({'message': f'Student {student.suid} has already claimed this project'}, status=status.HTTP_400_BAD_REQUEST)
+            # One query covers both accepted claims elsewhere and earlier claims on this project for the whole group.
+            conflicts = list(
+                ProjectClaim.objects.filter(Q(is_approved=True) | Q(project=project), students__in=valid_students)
+                .values_list('students__suid', 'is_approved')
+            )
+            if any(is_approved for _, is_approved in conflicts):
+                return Response({'message': 'One or more students already have an accepted project'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if project.claimed_by.count() + len(valid_students) > project.max_students:
-            return Response({'message': 'Project already claimed by the maximum number of students'}, status=status.HTTP_400_BAD_REQUEST)
+            if conflicts:
+                # Name the first conflicting student in request order, as the per-student checks did.
+                conflicting = {suid for suid, _ in conflicts}
+                duplicate_suid = next(student.suid for student in valid_students if student.suid in conflicting)
+                return Response({'message': f'Student {duplicate_suid} has already claimed this project'}, status=status.HTTP_400_BAD_REQUEST)
+
+            if project.claimed_count + len(valid_students) > project.max_students:
+                return Response({'message': 'Project already claimed by the maximum number of students'}, status=status.HTTP_400_BAD_REQUEST)
 
-        with transaction.atomic():
             project_claim = ProjectClaim.objects.create(project=project)
-            project_claim.students.add(*valid_students)
+            ProjectClaim.students.through.objects.bulk_create([
+                ProjectClaim.students.through(projectclaim=project_claim, student=student) for student in valid_students
+            ])
+            project_changed(project.pk)
 
         return Response({'message': 'Claim request sent successfully'}, status=status.HTTP_200_OK)
 
 @method_decorator(csrf_exempt, name='dispatch')
 class ApproveClaimRequestView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
@@ -132,11 +210,13 @@ class ApproveClaimRequestView(APIView):
 
         try:
             project = Project.objects.get(project_id=project_id)
-            student = Student.objects.get(suid=student_id)
         except Project.DoesNotExist:
             return Response({'message': 'Project not found'}, status=status.HTTP_404_NOT_FOUND)
-        except Student.DoesNotExist:
+
+        students, _ = Student.objects.resolve([student_id])
+        if not students:
             return Response({'message': 'Student not found'}, status=status.HTTP_404_NOT_FOUND)
+        student = students[0]
 
         try:
             claim = ProjectClaim.objects.get(project=project, students=student)
@@ -150,26 +230,18 @@ class ApproveClaimRequestView(APIView):
             if claim.is_approved:
                 return Response({'message': 'Claim request is already approved'}, status=status.HTTP_400_BAD_REQUEST)
 
-            claim.is_approved = True
-            claim.approved_at = timezone.now()
-            claim.save()
-
-            project.is_available = False
-            project.claimed_at = timezone.now()
-            project.save()
-
-            for student in claim.students.all():
-                project.claimed_by.add(student)
-
-            students_in_claim = claim.students.all()
-
-            for student in students_in_claim:
-                ProjectClaim.objects.filter(students=student).exclude(id=claim.id).delete()
+            try:
+                approved = claim.approve()
+            except ProjectAlreadyClaimed:
+                return Response({'message': 'Project is already claimed'}, status=status.HTTP_400_BAD_REQUEST)
+            if approved is None:
+                return Response({'message': 'Claim request is already approved'}, status=status.HTTP_400_BAD_REQUEST)
 
             return Response({'message': 'Claim request approved successfully'}, status=status.HTTP_200_OK)
 
         elif status_value == False:
             claim.delete()
+            project_changed(project.pk)
             return Response({'message': 'Claim request deleted successfully'}, status=status.HTTP_200_OK)
 
         else:
@@ -179,8 +251,88 @@ class ApproveClaimRequestView(APIView):
 
 
 @method_decorator(csrf_exempt, name='dispatch')
+class BatchApproveClaimsView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if not hasattr(request.user, 'professor'):
+            return Response({'message': 'Only professors can access this dashboard'}, status=status.HTTP_403_FORBIDDEN)
+
+        decisions = request.data.get('decisions')
+        if not isinstance(decisions, list) or not decisions:
+            return Response({'message': 'decisions must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        if not all(isinstance(decision, dict) for decision in decisions):
+            return Response({'message': 'Each decision must be an object'}, status=status.HTTP_400_BAD_REQUEST)
+
+        professor = request.user.professor
+        projects = {
+            project.project_id: project
+            for project in Project.objects.filter(project_id__in=[str(decision.get('project_id')) for decision in decisions])
+        }
+        students, _ = Student.objects.resolve([decision.get('student_id') for decision in decisions])
+        students = {student.suid: student for student in students}
+
+        claims = {}
+        claim_links = ProjectClaim.students.through.objects.filter(
+            projectclaim__project__in=projects.values(), student__in=students.values()
+        ).select_related('projectclaim')
+        for link in claim_links:
+            claims[(link.projectclaim.project_id, link.student_id)] = link.projectclaim
+
+        results = []
+        removed_claim_ids = set()
+        with transaction.atomic():
+            for decision in decisions:
+                project = projects.get(str(decision.get('project_id')))
+                student = students.get(str(decision.get('student_id')))
+                status_value = decision.get('status')
+                claim = claims.get((project.pk, student.pk)) if project and student else None
+
+                if status_value is None:
+                    outcome, message = 'error', 'Status is required'
+                elif project is None:
+                    outcome, message = 'error', 'Project not found'
+                elif student is None:
+                    outcome, message = 'error', 'Student not found'
+                elif claim is None or claim.pk in removed_claim_ids:
+                    outcome, message = 'error', 'Claim request not found'
+                elif project.professor_id != professor.pk:
+                    outcome, message = 'error', 'Only the professor can approve or delete this claim'
+                elif status_value == True:
+                    try:
+                        deleted_ids = None if claim.is_approved else claim.approve()
+                    except ProjectAlreadyClaimed:
+                        outcome, message = 'error', 'Project is already claimed'
+                    else:
+                        if deleted_ids is None:
+                            outcome, message = 'error', 'Claim request is already approved'
+                        else:
+                            removed_claim_ids.update(deleted_ids)
+                            outcome, message = 'approved', 'Claim request approved successfully'
+                elif status_value == False:
+                    removed_claim_ids.add(claim.pk)
+                    claim.delete()
+                    project_changed(project.pk)
+                    outcome, message = 'deleted', 'Claim request deleted successfully'
+                else:
+                    outcome, message = 'error', 'Invalid status value'
+
+                results.append({
+                    'project_id': decision.get('project_id'),
+                    'student_id': decision.get('student_id'),
+                    'result': outcome,
+                    'message': message,
+                })
+
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(condition(etag_func=dashboard_etag('professor')), name='get')
+@method_decorator(vary_on_headers('Authorization'), name='get')
 class ProfessorDashboardView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
@@ -188,24 +340,30 @@ class ProfessorDashboardView(APIView):
             return Response({'message': 'Only professors can access this dashboard'}, status=status.HTTP_403_FORBIDDEN)
 
         professor = request.user.professor
-        projects = Project.objects.filter(professor=professor)
-        
-        claims = ProjectClaim.objects.filter(project__in=projects)
-        
+        projects = ProjectSerializer.setup_eager_loading(Project.objects.filter(professor=professor))
+        claims = ProjectClaimSummarySerializer.setup_eager_loading(
+            ProjectClaim.objects.filter(project__professor=professor)
+        )
+
+        claims_by_project = defaultdict(list)
+        for claim in claims:
+            claims_by_project[claim.project_id].append(claim)
+
+        projects = list(projects)
         projects_data = []
-        for project in projects:
-            project_claims = claims.filter(project=project)
-            project_data = {
-                'project': ProjectSerializer(project).data,
-                'claims': ProjectClaimSerializer(project_claims, many=True).data
-            }
-            projects_data.append(project_data)
+        for project, project_data in zip(projects, ProjectSerializer(projects, many=True).data):
+            projects_data.append({
+                'project': project_data,
+                'claims': ProjectClaimSummarySerializer(claims_by_project[project.id], many=True).data
+            })
 
         return Response(projects_data, status=status.HTTP_200_OK)
     
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(condition(etag_func=dashboard_etag('student')), name='get')
+@method_decorator(vary_on_headers('Authorization'), name='get')
 class StudentDashboardView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated] 
 
     def get(self, request):
@@ -213,8 +371,12 @@ class StudentDashboardView(APIView):
             return Response({'message': 'Only students can access this dashboard'}, status=status.HTTP_403_FORBIDDEN)
 
         student = request.user.student
+        fieldset = parse_fieldset(request.query_params)
         claims = ProjectClaim.objects.filter(students=student)
-        serializer = ProjectClaimSerializer(claims, many=True)
+        if not fieldset:
+            return Response(serialize_claims(claim_values(claims)))
+        claims = ProjectClaimSerializer.setup_eager_loading(claims, **fieldset)
+        serializer = ProjectClaimSerializer(claims, many=True, **fieldset)
         return Response(serializer.data)
 
 @method_decorator(csrf_exempt, name='dispatch')
@@ -235,7 +397,7 @@ class UserLoginView(APIView):
             else:
                 return Response({'message': 'User role not found'}, status=status.HTTP_400_BAD_REQUEST)
 
-            refresh = RefreshToken.for_user(user)
+            refresh = ClaimsRefreshToken.for_user(user)
             return Response({
                 'message': 'User logged in successfully',
                 'token': str(refresh.access_token),
@@ -251,13 +413,21 @@ class UserLogoutView(APIView):
         return Response({'message': 'User logged out successfully'}, status=status.HTTP_200_OK)
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(condition(etag_func=catalog_etag), name='get')
 class AvailableProjectsListView(generics.ListAPIView):
     queryset = Project.objects.filter(is_available=True)
     serializer_class = ProjectSerializer
+    pagination_class = ProjectCursorPagination
+
+    def list(self, request, *args, **kwargs):
+        return Response(catalog_cache.get_or_build(
+            'available-projects', request,
+            lambda: paginate_projects(request, self.get_queryset(), absolute_urls=True),
+        ))
 
 @method_decorator(csrf_exempt, name='dispatch')
 class CreateProjectView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated] 
 
     def post(self, request):
@@ -275,7 +445,10 @@ class CreateProjectView(APIView):
         if Project.objects.filter(title=name).exists():
             return Response({'message': 'A project with this title already exists'}, status=status.HTTP_400_BAD_REQUEST)
         
-        project = Project.objects.create(professor=professor, title=name, max_students=capacity)
+        try:
+            project = Project.objects.create(professor=professor, title=name, max_students=capacity)
+        except ProjectIdsExhausted:
+            return Response({'message': 'No project IDs are left to assign'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         serializer = ProjectSerializer(project)
         
         return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -283,6 +456,8 @@ class CreateProjectView(APIView):
     
 @method_decorator(csrf_exempt, name='dispatch')
 class UploadFileView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser]
 
     def post(self, request, project_id):
@@ -304,31 +479,165 @@ class UploadFileView(APIView):
         if not claim.is_approved:
             return Response({'message': 'Your claim for this project has not been approved'}, status=status.HTTP_400_BAD_REQUEST)
 
+        if int(request.META.get('CONTENT_LENGTH') or 0) > uploads.max_upload_size():
+            return Response({'message': f'Files are limited to {uploads.max_upload_size()} bytes'}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
         file = request.FILES.get('file')
         if not file:
             return Response({'message': 'File not found in request'}, status=status.HTTP_400_BAD_REQUEST)
 
         project.project_file = file
+        project.project_file_name = os.path.basename(file.name)
         project.file_upload_date = timezone.now()
         project.save()
+        project_changed(project.pk)
 
         return Response({'message': 'File uploaded successfully'}, status=status.HTTP_200_OK)
 
+def refuse_upload(project, student):
+    # Checked when an upload starts and again when it completes, since the claim can be cancelled in between.
+    claim = ProjectClaim.objects.filter(project=project, students=student).first()
+    if claim is None:
+        return Response({'message': 'You have not claimed this project'}, status=status.HTTP_400_BAD_REQUEST)
+    if not claim.is_approved:
+        return Response({'message': 'Your claim for this project has not been approved'}, status=status.HTTP_400_BAD_REQUEST)
+    return None
+
+@method_decorator(csrf_exempt, name='dispatch')
+class CreateUploadSessionView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, project_id):
+        try:
+            project = Project.objects.get(project_id=project_id)
+        except Project.DoesNotExist:
+            return Response({'message': 'Project not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            student = request.user.student
+        except AttributeError:
+            return Response({'message': 'Only students can upload files'}, status=status.HTTP_403_FORBIDDEN)
+
+        refused = refuse_upload(project, student)
+        if refused is not None:
+            return refused
+
+        filename = os.path.basename(str(request.data.get('filename') or ''))
+        if not filename:
+            return Response({'message': 'filename is required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            size = int(request.data.get('size'))
+        except (TypeError, ValueError):
+            return Response({'message': 'size must be the file size in bytes'}, status=status.HTTP_400_BAD_REQUEST)
+        if size < 1:
+            return Response({'message': 'size must be the file size in bytes'}, status=status.HTTP_400_BAD_REQUEST)
+        if size > uploads.max_upload_size():
+            return Response({'message': f'Files are limited to {uploads.max_upload_size()} bytes'}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        session = UploadSession.objects.create(project=project, student=student, filename=filename, size=size)
+        return Response({'upload_id': str(session.pk), 'offset': 0, 'size': size}, status=status.HTTP_201_CREATED)
+
+@method_decorator(csrf_exempt, name='dispatch')
+class UploadSessionView(APIView):
+    """
+    GET reports how many bytes have been received, so an interrupted upload can resume from there.
+    PUT appends a chunk, with a Content-Range of "bytes start-end/size" starting at that offset.
+    """
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get_session(self, request, upload_id):
+        return UploadSession.objects.filter(pk=upload_id, student__user=request.user, completed_at__isnull=True).first()
+
+    def get(self, request, upload_id):
+        session = self.get_session(request, upload_id)
+        if session is None:
+            return Response({'message': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+        response = Response({'offset': session.received, 'size': session.size}, status=status.HTTP_200_OK)
+        response['Upload-Offset'] = str(session.received)
+        return response
+
+    def put(self, request, upload_id):
+        session = self.get_session(request, upload_id)
+        if session is None:
+            return Response({'message': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        content_length = request.META.get('CONTENT_LENGTH')
+        try:
+            offset = uploads.write_chunk(
+                session,
+                request.headers.get('Content-Range'),
+                int(content_length) if content_length else None,
+                request.stream,
+            )
+        except uploads.UploadError as error:
+            return Response({'message': error.message, 'offset': session.received}, status=error.status)
+
+        response = Response({'offset': offset, 'size': session.size}, status=status.HTTP_200_OK)
+        response['Upload-Offset'] = str(offset)
+        return response
+
+@method_decorator(csrf_exempt, name='dispatch')
+class CompleteUploadSessionView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, upload_id):
+        session = UploadSession.objects.filter(
+            pk=upload_id, student__user=request.user, completed_at__isnull=True
+        ).select_related('project', 'student').first()
+        if session is None:
+            return Response({'message': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        expected = request.data.get('sha256')
+        if expected not in (None, '') and not (isinstance(expected, str) and SHA256_RE.match(expected)):
+            return Response({'message': 'sha256 must be a 64-character hex digest'}, status=status.HTTP_400_BAD_REQUEST)
+
+        refused = refuse_upload(session.project, session.student)
+        if refused is not None:
+            return refused
+
+        try:
+            digest, upload = uploads.finish(session)
+        except uploads.UploadError as error:
+            return Response({'message': error.message, 'offset': session.received}, status=error.status)
+
+        if expected and expected.lower() != digest:
+            upload.close()
+            uploads.discard(session)
+            session.delete()
+            return Response({'message': 'Checksum mismatch, the upload has been discarded', 'sha256': digest}, status=status.HTTP_400_BAD_REQUEST)
+
+        project = session.project
+        with upload:
+            project.project_file.save(session.filename, upload, save=False)
+        project.project_file_name = session.filename
+        project.file_upload_date = timezone.now()
+        project.save()
+        project_changed(project.pk)
+
+        session.sha256 = digest
+        session.completed_at = project.file_upload_date
+        session.save(update_fields=['sha256', 'completed_at'])
+        uploads.discard(session)
+
+        return Response({'message': 'File uploaded successfully', 'sha256': digest}, status=status.HTTP_200_OK)
+
 @method_decorator(csrf_exempt, name='dispatch')
 class DownloadProjectFile(APIView):
     def get(self, request, project_id):
         project = get_object_or_404(Project, project_id=project_id)
-        project_file = project.project_file
-        if project_file:
-            response = FileResponse(project_file.open('rb'), content_type='application/octet-stream')
-            response['Content-Disposition'] = f'attachment; filename="{project_file.name}"'
-            return response
-        else:
-            return Response({'message': 'File not found for this project'}, status=404)
+        if project.project_file:
+            try:
+                return serve_project_file(request, project)
+            except FileNotFoundError:
+                pass
+        return Response({'message': 'File not found for this project'}, status=404)
 
 @method_decorator(csrf_exempt, name='dispatch')
 class StudentCancelClaimView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated] 
 
     def delete(self, request, project_id):
@@ -351,12 +660,13 @@ class StudentCancelClaimView(APIView):
             return Response({'message': 'Cannot cancel an approved claim'}, status=status.HTTP_400_BAD_REQUEST)
 
         claim.delete()
+        project_changed(project.pk)
 
         return Response({'message': 'Claim request canceled successfully'}, status=status.HTTP_200_OK)
     
 @method_decorator(csrf_exempt, name='dispatch')
 class ProfessorCancelClaimView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated] 
 
     def delete(self, request, project_id, student_id):
@@ -379,12 +689,93 @@ class ProfessorCancelClaimView(APIView):
             return Response({'message': 'Cannot cancel an approved claim'}, status=status.HTTP_400_BAD_REQUEST)
 
         claim.delete()
+        project_changed(project.pk)
 
         return Response({'message': 'Claim request canceled successfully'}, status=status.HTTP_200_OK)
 
 @method_decorator(csrf_exempt, name='dispatch')
+@method_decorator(condition(etag_func=catalog_etag), name='get')
 class CompletedProjectsView(APIView):
     def get(self, request):
         completed_projects = Project.objects.filter(is_available=False).exclude(project_file='')
-        serializer = ProjectSerializer(completed_projects, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
+        return Response(catalog_cache.get_or_build(
+            'completed-projects', request, lambda: paginate_projects(request, completed_projects)
+        ))
+
+def project_event_stream_unavailable(request):
+    # Under WSGI the never-ending stream would be drained into a list and hold a worker forever,
+    # so the stream itself is only routed by asgi_urls.
+    return JsonResponse({'message': 'Project events are only served by the ASGI application'}, status=501)
+
+async def project_event_stream(request):
+    # Async so that each open stream costs a coroutine instead of a worker thread under ASGI.
+    last_id = request.headers.get('Last-Event-ID', request.GET.get('last_event_id'))
+    try:
+        last_id = int(last_id) if last_id is not None else None
+    except ValueError:
+        last_id = None
+
+    async def stream():
+        subscription, backlog = project_events.subscribe(last_id)
+        try:
+            yield f'retry: {EVENT_STREAM_RETRY_MS}\n\n'
+            if backlog is None:
+                # The missed events are gone; the client has to re-fetch the listing.
+                yield format_event((subscription.start_id, 'reset', {}))
+                backlog = []
+            for event in backlog:
+                yield format_event(event)
+            while not subscription.overflowed:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), EVENT_STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield format_event(event)
+        finally:
+            project_events.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ClaimExportView(APIView):
+    """
+    Stream every claim as one row per student, for registrars. ?status=approved (the default),
+    pending or all; ?since= and ?until= limit the claims' creation date, inclusive.
+    """
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, export_format):
+        if export_format not in exports.EXPORT_FORMATS:
+            return Response({'message': f"Exports are available as {', '.join(exports.EXPORT_FORMATS)}"}, status=status.HTTP_404_NOT_FOUND)
+        params = request.query_params
+        try:
+            rows = exports.claim_rows(params.get('status') or 'approved', params.get('since'), params.get('until'))
+        except ValueError as error:
+            return Response({'message': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return exports.export_response(exports.export_lines(rows, export_format), export_format)
+
+@method_decorator(csrf_exempt, name='dispatch')
+class CatalogCacheStatsView(APIView):
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(catalog_cache.stats())
+
+@method_decorator(csrf_exempt, name='dispatch')
+class RequestTimingView(APIView):
+    """The slowest recent requests with their SQL, as kept by RequestTimingMiddleware; DELETE empties the list."""
+    authentication_classes = [ClaimsJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({'config': timing_config(), 'slow_requests': slow_requests.snapshot()})
+
+    def delete(self, request):
+        slow_requests.clear()
+        return Response(status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
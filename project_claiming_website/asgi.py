@@ -9,8 +9,27 @@ https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+from django.core.handlers.asgi import ASGIHandler
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "project_claiming_website.settings")
 
+ASGI_URLCONF = "project_claiming_website.asgi_urls"
+
+
+class ProjectASGIHandler(ASGIHandler):
+    """Routes requests through ASGI_URLCONF so reads are served by the async views."""
+
+    def create_request(self, scope, body_file):
+        request, error_response = super().create_request(scope, body_file)
+        if request is not None:
+            request.urlconf = ASGI_URLCONF
+        return request, error_response
+
+
+def get_asgi_application():
+    django.setup(set_prefix=False)
+    return ProjectASGIHandler()
+
+
 application = get_asgi_application()
@@ -0,0 +1,11 @@
+"""
+URL configuration used by the ASGI application: the async read views take precedence over
+their synchronous counterparts, and every other route falls through to the regular urlconf.
+"""
+from django.urls import path, include
+from .urls import urlpatterns as sync_urlpatterns
+
+
+urlpatterns = [
+    path('', include('professors_projects.async_urls')),
+] + sync_urlpatterns
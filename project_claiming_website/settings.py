@@ -51,7 +51,7 @@ SIMPLE_JWT = {
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'professors_projects.authentication.ClaimsJWTAuthentication',
     ),
 }
 
@@ -89,6 +89,8 @@ SIMPLE_JWT = {
 
 
 MIDDLEWARE = [
+    # Outermost, so its total covers the rest of the stack; see REQUEST_TIMING below.
+    "professors_projects.instrumentation.RequestTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     'corsheaders.middleware.CorsMiddleware',
@@ -155,6 +157,10 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Claim bursts queue on SQLite's write lock; wait for it rather than failing with "database is locked".
+        "OPTIONS": {"timeout": 20},
+        # A file-backed test database lets concurrency tests use one real connection per thread.
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
     }
 }
 
@@ -200,9 +206,51 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Response cache for the anonymous catalog listings, keyed by the catalog version.
+# Use professors_projects.cache.DjangoCacheBackend (OPTIONS: alias, timeout) to share it between processes.
+CATALOG_CACHE = {
+    'BACKEND': 'professors_projects.cache.LRUBackend',
+    'OPTIONS': {'max_entries': 512},
+}
+
 MEDIA_ROOT = BASE_DIR / 'media'
 MEDIA_URL = '/media/'
 
+# Project files are stored once per distinct content; see professors_projects.storage.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    "project_files": {"BACKEND": "professors_projects.storage.ContentAddressedStorage"},
+}
+
+# How DownloadProjectFile hands file bodies to a front proxy once the request is authorized:
+# None streams them from Django, 'x-accel-redirect' (nginx) or 'x-sendfile' (Apache, lighttpd)
+# send only headers. For nginx, PROJECT_FILE_ACCEL_PREFIX is an internal location aliased to MEDIA_ROOT.
+PROJECT_FILE_SENDFILE = None
+PROJECT_FILE_ACCEL_PREFIX = '/protected/'
+
+# Largest project file accepted, checked against the declared size before the body is read.
+# Chunked uploads are assembled in PROJECT_FILE_UPLOAD_DIR, outside MEDIA_ROOT so partial files are never served.
+PROJECT_FILE_MAX_UPLOAD_SIZE = 200 * 1024 * 1024
+PROJECT_FILE_UPLOAD_DIR = BASE_DIR / 'partial_uploads'
+# Seconds an unfinished chunked upload may go without a chunk before collect_project_files deletes it.
+PROJECT_FILE_UPLOAD_EXPIRY = 24 * 60 * 60
+
+# Seconds an authenticated user and their profile are reused without querying; 0 disables the cache.
+AUTH_USER_CACHE_TTL = 60
+
+# Per-request SQL and timing measurements. SAMPLE_RATE is the share of requests measured (0 turns it
+# off); those get a Server-Timing header and a JSON line on the professors_projects.timing logger,
+# at WARNING when slower than SLOW_REQUEST_MS or when a query template repeats more than
+# N_PLUS_ONE_THRESHOLD times. The last SLOW_REQUESTS_KEPT slow requests are listed, with their SQL,
+# at /api/request-timings/.
+REQUEST_TIMING = {
+    'SAMPLE_RATE': 0.1,
+    'SLOW_REQUEST_MS': 500,
+    'SLOW_REQUESTS_KEPT': 50,
+    'N_PLUS_ONE_THRESHOLD': 10,
+}
+
 TIME_ZONE = 'Asia/Tehran'
 
 USE_TZ = True